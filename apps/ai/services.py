@@ -1,49 +1,84 @@
 # apps/ai/services.py
 
-def ai_classify_room(raw_name: str, area: float) -> str:
+import functools
+import re
+
+# (keyword, label) pairs in priority order - earlier rules win
+KEYWORD_RULES = [
+    ("BED", "Bedroom"),
+    ("TOILET", "Bathroom"),
+    ("BATH", "Bathroom"),
+    ("WC", "Bathroom"),
+    ("KITCHEN", "Kitchen"),
+    ("LIVING", "Living Room"),
+    ("LOUNGE", "Living Room"),
+    ("DINING", "Dining Room"),
+    ("SERVANT", "Servant Room"),
+    ("STORE", "Store Room"),
+    ("BALCONY", "Balcony"),
+]
+
+# One capture group per rule inside a lookahead, so finditer sees
+# overlapping keywords ("SERVANTOILET") and lastindex is the priority + 1
+KEYWORD_PATTERN = re.compile(
+    "(?=" + "|".join(f"({re.escape(keyword)})" for keyword, _ in KEYWORD_RULES) + ")"
+)
+
+
+def match_keyword(text):
     """
-    AI-assisted room classification (rule-based + heuristic).
-    This is SAFE and does not require external AI yet.
+    Scan text once against KEYWORD_PATTERN.
+    Returns the label of the highest-priority keyword found, or None.
     """
+    best = None
 
-    if not raw_name:
-        return "Other"
+    for m in KEYWORD_PATTERN.finditer(text):
+        priority = m.lastindex - 1
+        if priority == 0:
+            return KEYWORD_RULES[0][1]
+        if best is None or priority < best:
+            best = priority
 
-    text = raw_name.upper().strip()
+    return KEYWORD_RULES[best][1] if best is not None else None
 
-    # ---- KEYWORD RULES ----
-    if "BED" in text:
-        return "Bedroom"
 
-    if "TOILET" in text or "BATH" in text or "WC" in text:
-        return "Bathroom"
+# Area fallback labels, largest room first
+_AREA_LABELS = ("Living Room", "Bedroom", "Kitchen")
 
-    if "KITCHEN" in text:
-        return "Kitchen"
 
-    if "LIVING" in text or "LOUNGE" in text:
-        return "Living Room"
+@functools.lru_cache(maxsize=4096)
+def _match_cached(text):
+    return match_keyword(text)
 
-    if "DINING" in text:
-        return "Dining Room"
 
-    if "SERVANT" in text:
-        return "Servant Room"
+def _area_label(area, thresholds, labels, inclusive):
+    for threshold, label in zip(thresholds, labels):
+        if area >= threshold if inclusive else area > threshold:
+            return label
+    return "Other"
 
-    if "STORE" in text:
-        return "Store Room"
 
-    if "BALCONY" in text:
-        return "Balcony"
+def ai_classify_room(raw_name: str, area: float, *, thresholds=(20, 10, 5),
+                     labels=_AREA_LABELS, inclusive=True,
+                     unnamed_by_area=False) -> str:
+    """
+    AI-assisted room classification (rule-based + heuristic).
+    This is SAFE and does not require external AI yet.
 
-    # ---- AREA-BASED FALLBACK ----
-    if area >= 20:
-        return "Living Room"
+    thresholds/labels drive the area fallback (largest first);
+    inclusive picks >= over > at the boundaries. An empty name is
+    "Other" unless unnamed_by_area sends it to the area fallback too.
+    """
 
-    if area >= 10:
-        return "Bedroom"
+    if not raw_name:
+        if unnamed_by_area:
+            return _area_label(area, thresholds, labels, inclusive)
+        return "Other"
 
-    if area >= 5:
-        return "Kitchen"
+    # ---- KEYWORD RULES ----
+    label = _match_cached(raw_name.upper().strip())
+    if label:
+        return label
 
-    return "Other"
+    # ---- AREA-BASED FALLBACK ----
+    return _area_label(area, thresholds, labels, inclusive)
@@ -0,0 +1,25 @@
+from django.test import SimpleTestCase
+
+from apps.ai import prompts, services
+
+
+class AiClassifyRoomTests(SimpleTestCase):
+    def test_keywords_win_over_area(self):
+        self.assertEqual(services.ai_classify_room("Master Bed", 50), "Bedroom")
+        self.assertEqual(prompts.ai_classify_room("servant toilet", 50), "Bathroom")
+
+    def test_prompts_area_fallback_is_exclusive(self):
+        self.assertEqual(prompts.ai_classify_room("Room", 12), "Bedroom")
+        self.assertEqual(prompts.ai_classify_room("Room", 12.5), "Living Room")
+        self.assertEqual(prompts.ai_classify_room("Room", 4), "Other")
+
+    def test_prompts_empty_name_uses_area(self):
+        self.assertEqual(prompts.ai_classify_room("", 15), "Living Room")
+        self.assertEqual(prompts.ai_classify_room("", 10), "Bedroom")
+        self.assertEqual(prompts.ai_classify_room("   ", 5), "Kitchen")
+        self.assertEqual(prompts.ai_classify_room("", 3), "Other")
+
+    def test_services_empty_name_is_other(self):
+        self.assertEqual(services.ai_classify_room("", 25), "Other")
+        self.assertEqual(services.ai_classify_room(None, 25), "Other")
+        self.assertEqual(services.ai_classify_room("   ", 25), "Living Room")
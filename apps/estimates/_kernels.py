@@ -0,0 +1,44 @@
+"""
+Numba kernels for estimate generation
+Pure float math only - all ORM work stays in the services
+"""
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def compute_room_costs(areas, wall_areas, wall_qty, floor_qty, rates):
+    """
+    Per-room light points, cement bags and cost for the standard line items
+
+    Quantities arrive already rounded: Numba's round() does not match
+    Python's on halfway cases, so decimal rounding stays with the caller.
+
+    Args:
+        areas: float64[:] floor area of each room (sqm)
+        wall_areas: float64[:] wall area of each room (sqm)
+        wall_qty: float64[:] wall area rounded to 2 places
+        floor_qty: float64[:] floor area rounded to 2 places
+        rates: float64[6] Brickwork, Plastering, Floor Tiling,
+               Wall Painting, Light Points, Switch Board rates
+
+    Returns:
+        tuple: (light_points, cement_bags, room_cost) arrays
+    """
+    n = areas.shape[0]
+    lights = np.empty(n, dtype=np.int64)
+    cement = np.empty(n, dtype=np.int64)
+    cost = np.empty(n)
+
+    for i in range(n):
+        wq = wall_qty[i]
+        lp = max(1, int(areas[i] / 10))
+
+        lights[i] = lp
+        cement[i] = int(wall_areas[i] * 0.2)
+        cost[i] = (
+            wq * rates[0] + wq * rates[1] + floor_qty[i] * rates[2]
+            + wq * rates[3] + lp * rates[4] + rates[5]
+        )
+
+    return lights, cement, cost
@@ -1,5 +1,15 @@
+import logging
+
 from django.apps import AppConfig
 
 class EstimatesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.estimates"
+
+    def ready(self):
+        # Keep estimate logging quiet unless the project configures a handler
+        logger = logging.getLogger(self.name)
+        if not logger.handlers:
+            logger.addHandler(logging.NullHandler())
+
+        from apps.estimates import signals
@@ -0,0 +1,101 @@
+"""
+Excel Generator for Construction Estimates
+Builds the estimate workbook and keeps rendered copies in default storage
+"""
+from apps.estimates.services_enhanced import get_estimate_totals, iter_line_items
+from apps.estimates.storage_cache import cached_render
+
+
+def generate_estimate_excel(project, estimate, output):
+    """
+    Write the estimate workbook to output (a path or binary file object)
+    """
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill, Alignment
+    
+    totals = get_estimate_totals(estimate)
+    
+    # Write-only workbook: rows are streamed out instead of kept as cells
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Estimate")
+    
+    # Column widths must be set before the first row is written
+    ws.column_dimensions['A'].width = 15
+    ws.column_dimensions['B'].width = 35
+    ws.column_dimensions['C'].width = 20
+    ws.column_dimensions['D'].width = 12
+    ws.column_dimensions['E'].width = 10
+    ws.column_dimensions['F'].width = 12
+    ws.column_dimensions['G'].width = 15
+    
+    def styled(value, **styles):
+        cell = WriteOnlyCell(ws, value=value)
+        for name, style in styles.items():
+            setattr(cell, name, style)
+        return cell
+    
+    # Title
+    ws.merged_cells.ranges.add('A1:F1')
+    ws.append([
+        styled(
+            f"PROJECT ESTIMATE - {project.name}",
+            font=Font(size=16, bold=True),
+            alignment=Alignment(horizontal='center')
+        )
+    ])
+    ws.append([])
+    
+    # Project Info
+    ws.append(['Project Type:', project.project_type])
+    ws.append(['Scope:', project.scope])
+    ws.append(['Location:', project.location])
+    ws.append([])
+    
+    # Headers
+    headers = ['Category', 'Item', 'Room', 'Quantity', 'Unit', 'Rate (₹)', 'Amount (₹)']
+    
+    header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
+    header_font = Font(color='FFFFFF', bold=True)
+    header_alignment = Alignment(horizontal='center')
+    
+    ws.append([
+        styled(header, fill=header_fill, font=header_font, alignment=header_alignment)
+        for header in headers
+    ])
+    
+    # Data
+    for item in iter_line_items(estimate):
+        ws.append([
+            item['category'],
+            item['item_name'],
+            item['room__name'] or '-',
+            item['quantity'],
+            item['unit'],
+            item['rate'],
+            item['amount'],
+        ])
+    
+    # Totals
+    bold = Font(bold=True)
+    big_bold = Font(bold=True, size=14)
+    pad = [None] * 5
+    
+    ws.append([])
+    ws.append(pad + [styled('Subtotal:', font=bold), styled(totals['total_cost'], font=bold)])
+    ws.append(pad + [styled('GST (18%):', font=bold), styled(totals['gst'], font=bold)])
+    ws.append(pad + [styled('Grand Total:', font=big_bold), styled(totals['grand_total'], font=big_bold)])
+    
+    wb.save(output)
+
+
+def cached_estimate_excel(project, estimate):
+    """
+    Open the rendered workbook for this estimate, building it on a miss
+    Stored per estimate version (see storage_cache), so repeat downloads
+    skip openpyxl entirely.
+    """
+    return cached_render(
+        project, estimate, '.xlsx',
+        lambda output: generate_estimate_excel(project, estimate, output),
+    )
@@ -0,0 +1,74 @@
+"""
+Per-room estimate figures shared by both estimate generators
+
+Pure float math, no ORM queries. NumPy and the Numba kernel are imported
+on the first calculation, not at import time, so loading the estimate
+services stays cheap on worker start-up.
+"""
+import functools
+
+# Wall-to-floor area ratio per Room.room_type, 3.0 for anything else
+WALL_AREA_RATIOS = {
+    'Toilet': 2.5,
+    'Bedroom': 3.0,
+    'Living Room': 3.5,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _room_cost_kernel():
+    """(numpy, compute_room_costs), or None when Numba isn't installed"""
+    try:
+        import numpy as np
+        from apps.estimates._kernels import compute_room_costs
+    except ImportError:
+        return None
+    return np, compute_room_costs
+
+
+def calculate_room_figures(rooms, rates):
+    """
+    Per-room (wall_area, light_points, cement_bags, sand_tons, room_cost)
+
+    Rooms need area and room_type loaded. rates is the list of Brickwork,
+    Plastering, Floor Tiling, Wall Painting, Light Points and Switch Board
+    rates. Uses the Numba kernel when available.
+    """
+    areas = [room.area for room in rooms]
+    wall_areas = [room.area * WALL_AREA_RATIOS.get(room.room_type, 3.0) for room in rooms]
+    wall_qty = [round(w, 2) for w in wall_areas]
+    floor_qty = [round(a, 2) for a in areas]
+    sand_tons = [round(w * 0.007, 2) for w in wall_areas]
+
+    kernel = _room_cost_kernel()
+    if kernel is not None:
+        np, compute_room_costs = kernel
+        lights, cement, costs = (
+            a.tolist() for a in compute_room_costs(
+                np.array(areas, dtype=np.float64),
+                np.array(wall_areas, dtype=np.float64),
+                np.array(wall_qty, dtype=np.float64),
+                np.array(floor_qty, dtype=np.float64),
+                np.array(rates, dtype=np.float64),
+            )
+        )
+    else:
+        lights, cement, costs = [], [], []
+        for area, wall_area, wq, fq in zip(areas, wall_areas, wall_qty, floor_qty):
+            light_points = max(1, int(area / 10))  # 1 point per 10 sqm
+            lights.append(light_points)
+            cement.append(int(wall_area * 0.2))  # Rough estimate
+            costs.append(
+                wq * rates[0] + wq * rates[1] + fq * rates[2]
+                + wq * rates[3] + light_points * rates[4] + rates[5]
+            )
+
+    return list(zip(wall_areas, lights, cement, sand_tons, costs))
+
+
+def summarize_by_category(line_items):
+    """Category totals from line items that are already loaded"""
+    summary = {}
+    for item in line_items:
+        summary[item.category] = summary.get(item.category, 0.0) + item.amount
+    return dict(sorted(summary.items()))
@@ -1,5 +1,10 @@
 # apps/estimates/materials.py
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 MATERIAL_RULES = {
     "Bedroom": {
         "cement_bags_per_sqm": 0.4,
@@ -34,27 +39,68 @@ MATERIAL_RULES = {
 }
 
 
-def calculate_materials(rooms):
-    data = {
-        "cement_bags": 0,
-        "sand_tons": 0,
-        "total_paint_sqm": 0,
-        "total_tiles_sqm": 0,
+# Rules pre-unpacked per room type:
+# (cement_bags_per_sqm, sand_tons_per_sqm, paint_sqm_ratio, tiles_ratio)
+_TUPLES = {
+    k: (r["cement_bags_per_sqm"], r["sand_tons_per_sqm"], r["paint_sqm_ratio"], r["tiles_ratio"])
+    for k, r in MATERIAL_RULES.items()
+}
+
+# Rules as a (room_type, material) matrix; columns follow the order of the
+# keys returned by calculate_materials
+RULE_KEYS = ["Bedroom", "Kitchen", "Toilet", "Living Room", "Other"]
+RULE_INDEX = {k: i for i, k in enumerate(RULE_KEYS)}
+OTHER_ROW = RULE_INDEX["Other"]  # sentinel row for unknown room types
+
+if np is not None:
+    # Frozen, C-contiguous (K, 4) float64 block: safe to share and to hand
+    # straight to compiled kernels
+    RULE_MATRIX = np.ascontiguousarray(
+        [_TUPLES[k] for k in RULE_KEYS], dtype=np.float64
+    )
+    RULE_MATRIX.flags.writeable = False
+
+
+def _rounded(cement, sand, paint, tiles):
+    return {
+        "cement_bags": round(cement),
+        "sand_tons": round(sand, 2),
+        "total_paint_sqm": round(paint, 2),
+        "total_tiles_sqm": round(tiles, 2),
     }
 
+
+def _calculate_materials_py(rooms):
+    """Pure-Python fallback when NumPy is not installed"""
+    cb = ss = tp = tt = 0.0
+    rule_for = _TUPLES.get
+    other = _TUPLES["Other"]
+
     for room in rooms:
-        rule = MATERIAL_RULES.get(room.room_type, MATERIAL_RULES["Other"])
+        c, s, p, t = rule_for(room.room_type, other)
         area = room.area
 
-        data["cement_bags"] += area * rule["cement_bags_per_sqm"]
-        data["sand_tons"] += area * rule["sand_tons_per_sqm"]
-        data["total_paint_sqm"] += area * rule["paint_sqm_ratio"]
-        data["total_tiles_sqm"] += area * rule["tiles_ratio"]
+        cb += area * c
+        ss += area * s
+        tp += area * p
+        tt += area * t
+
+    return _rounded(cb, ss, tp, tt)
+
+
+def calculate_materials(rooms):
+    if np is None:
+        return _calculate_materials_py(rooms)
+
+    rooms = list(rooms)
+
+    idx = np.fromiter(
+        (RULE_INDEX.get(r.room_type, OTHER_ROW) for r in rooms),
+        dtype=np.int32,
+        count=len(rooms),
+    )
+    areas = np.fromiter((r.area for r in rooms), dtype=np.float64, count=len(rooms))
 
-    # rounding
-    data["cement_bags"] = round(data["cement_bags"])
-    data["sand_tons"] = round(data["sand_tons"], 2)
-    data["total_paint_sqm"] = round(data["total_paint_sqm"], 2)
-    data["total_tiles_sqm"] = round(data["total_tiles_sqm"], 2)
+    cement, sand, paint, tiles = (areas[:, None] * RULE_MATRIX[idx]).sum(axis=0).tolist()
 
-    return data
+    return _rounded(cement, sand, paint, tiles)
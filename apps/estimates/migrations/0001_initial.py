@@ -0,0 +1,111 @@
+# Generated by Django 5.2.18 on 2026-10-14 09:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('projects', '0001_initial'),
+        ('rooms', '0002_room_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Estimate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_tiles_sqm', models.FloatField(default=0)),
+                ('total_paint_sqm', models.FloatField(default=0)),
+                ('cement_bags', models.IntegerField(default=0)),
+                ('sand_tons', models.FloatField(default=0)),
+                ('total_cost', models.FloatField(default=0)),
+                ('category_summary', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='estimate', to='projects.project')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EstimateLineItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('Civil', 'Civil Work'), ('Interior', 'Interior Work'), ('Electrical', 'Electrical Work'), ('Plumbing', 'Plumbing Work'), ('Painting', 'Painting Work'), ('Flooring', 'Flooring Work')], max_length=50)),
+                ('item_name', models.CharField(max_length=150)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('quantity', models.FloatField(help_text='Quantity of work')),
+                ('unit', models.CharField(help_text='sqm, sqft, nos, etc.', max_length=20)),
+                ('rate', models.FloatField(help_text='Rate per unit in ₹')),
+                ('amount', models.FloatField(editable=False, help_text='Total amount (quantity × rate)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('estimate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='line_items', to='estimates.estimate')),
+                ('room', models.ForeignKey(blank=True, help_text='Room this item belongs to (if applicable)', null=True, on_delete=django.db.models.deletion.SET_NULL, to='rooms.room')),
+            ],
+            options={
+                'ordering': ['category', 'item_name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RateCard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('Civil', 'Civil Work'), ('Interior', 'Interior Work'), ('Electrical', 'Electrical Work'), ('Plumbing', 'Plumbing Work'), ('Painting', 'Painting Work'), ('Flooring', 'Flooring Work')], max_length=50)),
+                ('item_name', models.CharField(max_length=150)),
+                ('unit', models.CharField(max_length=20)),
+                ('rate', models.FloatField(help_text='Rate per unit in ₹')),
+                ('location', models.CharField(blank=True, help_text='Specific location for this rate (optional)', max_length=100, null=True)),
+                ('effective_from', models.DateField()),
+                ('is_active', models.BooleanField(default=True)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['category', 'item_name'],
+                'indexes': [models.Index(fields=['category', 'item_name', 'is_active', '-effective_from'], name='ratecard_lookup_idx')],
+                'unique_together': {('category', 'item_name', 'location', 'effective_from')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RoomEstimate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tiles_sqm', models.FloatField(default=0)),
+                ('paint_sqm', models.FloatField(default=0)),
+                ('cement_bags', models.IntegerField(default=0)),
+                ('sand_tons', models.FloatField(default=0)),
+                ('cost', models.FloatField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='room_estimates', to='projects.project')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estimate', to='rooms.room')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WorkProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('planned_quantity', models.FloatField()),
+                ('completed_quantity', models.FloatField(default=0)),
+                ('status', models.CharField(choices=[('not_started', 'Not Started'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('on_hold', 'On Hold')], default='not_started', max_length=20)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('target_completion_date', models.DateField(blank=True, null=True)),
+                ('actual_completion_date', models.DateField(blank=True, null=True)),
+                ('remarks', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('line_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='estimates.estimatelineitem')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='work_progress', to='projects.project')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='estimatelineitem',
+            index=models.Index(fields=['estimate', 'category'], name='estimates_e_estimat_37a139_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roomestimate',
+            index=models.Index(fields=['project', 'room'], name='estimates_r_project_c252e7_idx'),
+        ),
+    ]
@@ -3,7 +3,10 @@ Enhanced Estimation Models with detailed line items
 Add this to apps/estimates/models.py
 """
 
+from datetime import date
+
 from django.db import models
+from django.db.models.functions import Round
 from apps.projects.models import Project
 from apps.rooms.models import Room
 
@@ -21,6 +24,8 @@ class Estimate(models.Model):
     sand_tons = models.FloatField(default=0)
 
     total_cost = models.FloatField(default=0)
+    # {category: amount}, written when the estimate is generated
+    category_summary = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -47,6 +52,11 @@ class RoomEstimate(models.Model):
 
     cost = models.FloatField(default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'room']),
+        ]
+
     def __str__(self):
         return f"{self.room.name} - ₹{self.cost}"
 
@@ -87,17 +97,24 @@ class EstimateLineItem(models.Model):
     quantity = models.FloatField(help_text="Quantity of work")
     unit = models.CharField(max_length=20, help_text="sqm, sqft, nos, etc.")
     rate = models.FloatField(help_text="Rate per unit in ₹")
-    amount = models.FloatField(help_text="Total amount (quantity × rate)")
+    amount = models.FloatField(editable=False, help_text="Total amount (quantity × rate)")
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['category', 'item_name']
+        indexes = [
+            models.Index(fields=['estimate', 'category']),
+        ]
 
     def save(self, *args, **kwargs):
-        # Auto-calculate amount
-        self.amount = self.quantity * self.rate
+        # Auto-calculate amount, unless a partial update leaves it untouched
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'quantity' in update_fields or 'rate' in update_fields:
+            self.amount = self.quantity * self.rate
+            if update_fields is not None and 'amount' not in update_fields:
+                kwargs['update_fields'] = list(update_fields) + ['amount']
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -134,11 +151,36 @@ class RateCard(models.Model):
     class Meta:
         ordering = ['category', 'item_name']
         unique_together = ['category', 'item_name', 'location', 'effective_from']
+        indexes = [
+            # Active-rate lookup: equality filters, then newest effective_from
+            models.Index(
+                fields=['category', 'item_name', 'is_active', '-effective_from'],
+                name='ratecard_lookup_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.category} - {self.item_name} @ ₹{self.rate}/{self.unit}"
 
 
+class WorkProgressQuerySet(models.QuerySet):
+    def with_completion(self):
+        """Annotate completion_pct so list views don't compute it per row"""
+        return self.annotate(
+            completion_pct=models.Case(
+                models.When(planned_quantity=0, then=models.Value(0.0)),
+                default=Round(
+                    models.ExpressionWrapper(
+                        models.F('completed_quantity') * 100.0 / models.F('planned_quantity'),
+                        output_field=models.FloatField()
+                    ),
+                    2
+                ),
+                output_field=models.FloatField(),
+            )
+        )
+
+
 class WorkProgress(models.Model):
     """
     Track progress of work items
@@ -171,9 +213,15 @@ class WorkProgress(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = WorkProgressQuerySet.as_manager()
+
     @property
     def completion_percentage(self):
         """Calculate completion percentage"""
+        # Use the SQL annotation from with_completion() when present
+        completion_pct = getattr(self, 'completion_pct', None)
+        if completion_pct is not None:
+            return completion_pct
         if self.planned_quantity == 0:
             return 0
         return round((self.completed_quantity / self.planned_quantity) * 100, 2)
@@ -182,7 +230,6 @@ class WorkProgress(models.Model):
     def is_delayed(self):
         """Check if work is delayed"""
         if self.target_completion_date and self.status != 'completed':
-            from datetime import date
             return date.today() > self.target_completion_date
         return False
 
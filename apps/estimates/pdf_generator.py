@@ -1,42 +1,172 @@
 """
 PDF Generator for Construction Estimates
 Generates professional PDF estimates from project data
+
+reportlab is imported on first use, so importing the estimates views does
+not pay for it on worker start-up.
 """
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
-from django.conf import settings
-import os
+import functools
+from io import BytesIO
+from pathlib import Path
 from datetime import datetime
 
+from apps.estimates.storage_cache import cached_render
+
+# Body rows per room-breakdown Table; even, so the row stripes line up across blocks
+ROOM_TABLE_ROWS = 40
+
+
+# Styles are immutable, build them once per process
+@functools.lru_cache(maxsize=None)
+def _pdf_styles():
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+
+    styles = getSampleStyleSheet()
+
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1a1a1a'),
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        fontName='Helvetica-Bold'
+    )
+
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#2c3e50'),
+        spaceAfter=12,
+        spaceBefore=12,
+        fontName='Helvetica-Bold'
+    )
+
+    note_style = ParagraphStyle(
+        'Note',
+        parent=styles['Normal'],
+        fontSize=8,
+        textColor=colors.grey,
+        alignment=TA_CENTER
+    )
+
+    # TableStyles are plain command lists and can be shared between tables
+    project_info_tablestyle = TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#ecf0f1')),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#2c3e50')),
+        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ])
+
+    def room_body_commands(first):
+        # Body styling, starting at row `first`
+        return [
+            ('BACKGROUND', (0, first), (-1, -1), colors.white),
+            ('TEXTCOLOR', (0, first), (-1, -1), colors.HexColor('#2c3e50')),
+            ('ALIGN', (1, first), (-1, -1), 'CENTER'),
+            ('ALIGN', (0, first), (0, -1), 'LEFT'),
+            ('FONTNAME', (0, first), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, first), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('TOPPADDING', (0, first), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, first), (-1, -1), 8),
+
+            # Alternating row colors
+            ('ROWBACKGROUNDS', (0, first), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+        ]
+
+    room_tablestyle = TableStyle([
+        # Header styling
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('TOPPADDING', (0, 0), (-1, 0), 12),
+    ] + room_body_commands(1))
+
+    # Continuation tables of the room breakdown carry no header row
+    room_body_tablestyle = TableStyle(room_body_commands(0))
+
+    materials_tablestyle = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+    ])
+
+    total_tablestyle = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#27ae60')),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.whitesmoke),
+        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+        ('ALIGN', (1, 0), (1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 14),
+        ('TOPPADDING', (0, 0), (-1, -1), 15),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
+    ])
+
+    return {
+        'title': title_style,
+        'heading': heading_style,
+        'note': note_style,
+        'project_info': project_info_tablestyle,
+        'room': room_tablestyle,
+        'room_body': room_body_tablestyle,
+        'materials': materials_tablestyle,
+        'total': total_tablestyle,
+    }
 
-def generate_estimate_pdf(project, estimate, room_estimates):
+
+def generate_estimate_pdf(project, estimate, room_estimates, *, output=None, generated_at=None):
     """
     Generate a professional estimate PDF
     
     Args:
         project: Project object
         estimate: Estimate object  
-        room_estimates: QuerySet of RoomEstimate objects
+        room_estimates: Iterable of RoomEstimate objects (with room loaded)
+        output: Optional file path to also write the PDF to
+        generated_at: Optional datetime for the document date, so batch
+            callers can stamp every PDF from one clock read
     
     Returns:
-        str: Path to generated PDF file
+        bytes: PDF content, or str: output path when output is given
     """
-    # Create output directory if it doesn't exist
-    output_dir = os.path.join(settings.MEDIA_ROOT, 'estimates')
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Generate filename
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f"estimate_{project.id}_{timestamp}.pdf"
-    filepath = os.path.join(output_dir, filename)
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
+
+    styles = _pdf_styles()
+    doc_date = (generated_at or datetime.now()).strftime('%B %d, %Y')
+
+    # Render in memory; only touch the filesystem when asked to
+    buf = BytesIO()
     
     # Create PDF document
     doc = SimpleDocTemplate(
-        filepath,
+        buf,
         pagesize=A4,
         rightMargin=72,
         leftMargin=72,
@@ -47,32 +177,8 @@ def generate_estimate_pdf(project, estimate, room_estimates):
     # Container for the 'Flowable' objects
     elements = []
     
-    # Get styles
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#2c3e50'),
-        spaceAfter=12,
-        spaceBefore=12,
-        fontName='Helvetica-Bold'
-    )
-    
     # Title
-    title = Paragraph("PROJECT ESTIMATE", title_style)
+    title = Paragraph("PROJECT ESTIMATE", styles['title'])
     elements.append(title)
     elements.append(Spacer(1, 12))
     
@@ -83,79 +189,52 @@ def generate_estimate_pdf(project, estimate, room_estimates):
         ['Scope:', project.scope],
         ['Location:', project.location],
         ['Built-up Area:', f"{project.builtup_area} sqft"],
-        ['Date:', datetime.now().strftime('%B %d, %Y')],
+        ['Date:', doc_date],
     ]
     
     project_table = Table(project_info_data, colWidths=[2*inch, 4*inch])
-    project_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#ecf0f1')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#2c3e50')),
-        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-    ]))
+    project_table.setStyle(styles['project_info'])
     
     elements.append(project_table)
     elements.append(Spacer(1, 20))
     
     # Room-wise Breakdown Section
-    if room_estimates:
-        room_heading = Paragraph("Room-wise Breakdown", heading_style)
+    # room_estimates may be a one-shot iterator, so collect the rows first
+    room_data = [['Room Name', 'Tiles (sqm)', 'Paint (sqm)', 'Cement (bags)', 'Sand (tons)', 'Cost (₹)']]
+    
+    for r in room_estimates:
+        room_data.append([
+            r.room.name,
+            f"{r.tiles_sqm:.2f}",
+            f"{r.paint_sqm:.2f}",
+            str(r.cement_bags),
+            f"{r.sand_tons:.2f}",
+            f"₹ {r.cost:,.2f}"
+        ])
+    
+    if len(room_data) > 1:
+        room_heading = Paragraph("Room-wise Breakdown", styles['heading'])
         elements.append(room_heading)
         elements.append(Spacer(1, 12))
         
-        # Room table headers
-        room_data = [['Room Name', 'Tiles (sqm)', 'Paint (sqm)', 'Cement (bags)', 'Sand (tons)', 'Cost (₹)']]
+        # One Table per block of rows: reportlab re-measures a long table
+        # on every page split, so a single big table renders in
+        # super-linear time. Stacked blocks draw as one continuous grid.
+        col_widths = [1.5*inch, 1*inch, 1*inch, 1*inch, 1*inch, 1.2*inch]
         
-        # Add room data
-        for r in room_estimates:
-            room_data.append([
-                r.room.name,
-                f"{r.tiles_sqm:.2f}",
-                f"{r.paint_sqm:.2f}",
-                str(r.cement_bags),
-                f"{r.sand_tons:.2f}",
-                f"₹ {r.cost:,.2f}"
-            ])
+        room_table = Table(room_data[:1 + ROOM_TABLE_ROWS], colWidths=col_widths)
+        room_table.setStyle(styles['room'])
+        elements.append(room_table)
         
-        room_table = Table(room_data, colWidths=[1.5*inch, 1*inch, 1*inch, 1*inch, 1*inch, 1.2*inch])
-        room_table.setStyle(TableStyle([
-            # Header styling
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('TOPPADDING', (0, 0), (-1, 0), 12),
-            
-            # Body styling
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#2c3e50')),
-            ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
-            ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 1), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-            
-            # Alternating row colors
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
-        ]))
+        for start in range(1 + ROOM_TABLE_ROWS, len(room_data), ROOM_TABLE_ROWS):
+            room_table = Table(room_data[start:start + ROOM_TABLE_ROWS], colWidths=col_widths)
+            room_table.setStyle(styles['room_body'])
+            elements.append(room_table)
         
-        elements.append(room_table)
         elements.append(Spacer(1, 20))
     
     # Materials Summary Section
-    materials_heading = Paragraph("Materials Summary", heading_style)
+    materials_heading = Paragraph("Materials Summary", styles['heading'])
     elements.append(materials_heading)
     elements.append(Spacer(1, 12))
     
@@ -168,20 +247,7 @@ def generate_estimate_pdf(project, estimate, room_estimates):
     ]
     
     materials_table = Table(materials_data, colWidths=[3*inch, 2*inch, 1.5*inch])
-    materials_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
-    ]))
+    materials_table.setStyle(styles['materials'])
     
     elements.append(materials_table)
     elements.append(Spacer(1, 30))
@@ -192,37 +258,43 @@ def generate_estimate_pdf(project, estimate, room_estimates):
     ]
     
     total_table = Table(total_data, colWidths=[4*inch, 2.5*inch])
-    total_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#27ae60')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.whitesmoke),
-        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-        ('ALIGN', (1, 0), (1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 14),
-        ('TOPPADDING', (0, 0), (-1, -1), 15),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
-    ]))
+    total_table.setStyle(styles['total'])
     
     elements.append(total_table)
     elements.append(Spacer(1, 30))
     
     # Footer note
-    note_style = ParagraphStyle(
-        'Note',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.grey,
-        alignment=TA_CENTER
-    )
-    
     note = Paragraph(
         "This estimate is based on the uploaded floor plan analysis and standard material rates. "
         "Actual costs may vary based on market conditions and specific requirements.",
-        note_style
+        styles['note']
     )
     elements.append(note)
     
     # Build PDF
     doc.build(elements)
     
-    return filepath
+    if output is None:
+        return buf.getvalue()
+    
+    path = Path(output)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(buf.getvalue())
+    return str(path)
+
+
+def cached_estimate_pdf(project, estimate, room_estimates):
+    """
+    Open the rendered PDF for this estimate, building it on a miss
+
+    Stored per estimate version like cached_estimate_excel. The document
+    is dated with the estimate's updated_at, so a stored copy stays
+    correct. room_estimates is only consumed on a miss; pass a lazy
+    queryset/iterator.
+    """
+    return cached_render(
+        project, estimate, '.pdf',
+        lambda output: output.write(generate_estimate_pdf(
+            project, estimate, room_estimates, generated_at=estimate.updated_at
+        )),
+    )
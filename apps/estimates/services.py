@@ -3,10 +3,17 @@ Enhanced Estimation Service - Generates detailed line items
 This replaces the simplified estimation in apps/estimates/services.py
 """
 
+import logging
+
+from django.db import transaction
+
 from apps.rooms.models import Room
 from apps.estimates.models import Estimate, RoomEstimate, EstimateLineItem, RateCard
+from apps.estimates.figures import calculate_room_figures, summarize_by_category
 from datetime import date
 
+logger = logging.getLogger(__name__)
+
 
 # Default rate card if no custom rates exist
 DEFAULT_RATES = {
@@ -36,57 +43,42 @@ DEFAULT_RATES = {
     },
 }
 
+# DEFAULT_RATES flattened to (category, item_name) keys for one-hash lookups
+_DEFAULT_RATES_FLAT = {
+    (category, item_name): rate
+    for category, items in DEFAULT_RATES.items()
+    for item_name, rate in items.items()
+}
+_MISS = {'rate': 0, 'unit': 'sqm'}
+
 
 def get_rate_for_item(category, item_name, location=None):
     """
     Get rate from RateCard or default rates
     """
-    try:
-        rate_card = RateCard.objects.filter(
-            category=category,
-            item_name=item_name,
-            is_active=True,
-            effective_from__lte=date.today()
-        ).order_by('-effective_from').first()
-        
-        if rate_card:
-            return {'rate': rate_card.rate, 'unit': rate_card.unit}
-    except:
-        pass
+    rate_card = RateCard.objects.filter(
+        category=category,
+        item_name=item_name,
+        is_active=True,
+        effective_from__lte=date.today()
+    ).order_by('-effective_from').values('rate', 'unit').first()
     
-    # Fallback to default rates
-    return DEFAULT_RATES.get(category, {}).get(item_name, {'rate': 0, 'unit': 'sqm'})
-
-
-def calculate_wall_area(floor_area, room_name=''):
-    """
-    Estimate wall area from floor area
-    Different room types have different wall area ratios
-    """
-    # Assuming average room height of 3m
-    # Wall area = perimeter × height
-    # For a square room: perimeter ≈ 4 × sqrt(area)
-    import math
+    if rate_card:
+        return rate_card
     
-    # Simplified calculation
-    if 'TOILET' in room_name.upper() or 'BATHROOM' in room_name.upper():
-        return floor_area * 2.5  # Smaller perimeter-to-area ratio
-    elif 'BEDROOM' in room_name.upper():
-        return floor_area * 3.0
-    elif 'LIVING' in room_name.upper() or 'HALL' in room_name.upper():
-        return floor_area * 3.5  # Larger rooms
-    else:
-        return floor_area * 3.0  # Default
+    # Fallback to default rates
+    return _DEFAULT_RATES_FLAT.get((category, item_name), _MISS)
 
 
+@transaction.atomic
 def generate_detailed_estimate(project_id):
     """
     Generate detailed estimate with line items for each work type
     """
-    rooms = Room.objects.filter(project_id=project_id)
+    rooms = list(Room.objects.filter(project_id=project_id).only('id', 'name', 'area', 'room_type'))
 
-    if not rooms.exists():
-        print("⚠️ No rooms found, skipping estimate")
+    if not rooms:
+        logger.warning("No rooms found for project %s, skipping estimate", project_id)
         return None
 
     # Clean old estimates
@@ -97,81 +89,96 @@ def generate_detailed_estimate(project_id):
     estimate, _ = Estimate.objects.get_or_create(project_id=project_id)
     
     total_cost = 0
+    total_tiles = 0
+    total_paint = 0
     line_items_data = []
+    room_estimates = []
+
+    brickwork_rate = get_rate_for_item('Civil', 'Brickwork')
+    plastering_rate = get_rate_for_item('Civil', 'Plastering')
+    tiling_rate = get_rate_for_item('Interior', 'Floor Tiling')
+    painting_rate = get_rate_for_item('Painting', 'Wall Painting')
+    light_rate = get_rate_for_item('Electrical', 'Light Points')
+    switch_rate = get_rate_for_item('Electrical', 'Switch Board')
 
-    for room in rooms:
+    figures = calculate_room_figures(rooms, [
+        brickwork_rate['rate'],
+        plastering_rate['rate'],
+        tiling_rate['rate'],
+        painting_rate['rate'],
+        light_rate['rate'],
+        switch_rate['rate'],
+    ])
+
+    for room, (wall_area, light_points, cement_bags, sand_tons, room_cost) in zip(rooms, figures):
         floor_area = room.area
-        wall_area = calculate_wall_area(floor_area, room.name)
-        room_cost = 0
+        wall_qty = round(wall_area, 2)
+        floor_qty = round(floor_area, 2)
 
         # ============ CIVIL WORKS ============
         
         # Brickwork (walls)
-        brickwork_rate = get_rate_for_item('Civil', 'Brickwork')
-        brickwork_item = EstimateLineItem.objects.create(
+        brickwork_item = EstimateLineItem(
             estimate=estimate,
             room=room,
             category='Civil',
             item_name=f'{room.name} - Brickwork',
-            quantity=round(wall_area, 2),
+            quantity=wall_qty,
             unit=brickwork_rate['unit'],
             rate=brickwork_rate['rate'],
+            amount=wall_qty * brickwork_rate['rate'],
         )
-        room_cost += brickwork_item.amount
         line_items_data.append(brickwork_item)
 
         # Plastering (walls)
-        plastering_rate = get_rate_for_item('Civil', 'Plastering')
-        plastering_item = EstimateLineItem.objects.create(
+        plastering_item = EstimateLineItem(
             estimate=estimate,
             room=room,
             category='Civil',
             item_name=f'{room.name} - Wall Plastering',
-            quantity=round(wall_area, 2),
+            quantity=wall_qty,
             unit=plastering_rate['unit'],
             rate=plastering_rate['rate'],
+            amount=wall_qty * plastering_rate['rate'],
         )
-        room_cost += plastering_item.amount
         line_items_data.append(plastering_item)
 
         # ============ FLOORING ============
         
         # Floor Tiling
-        tiling_rate = get_rate_for_item('Interior', 'Floor Tiling')
-        tiling_item = EstimateLineItem.objects.create(
+        tiling_item = EstimateLineItem(
             estimate=estimate,
             room=room,
             category='Interior',
             item_name=f'{room.name} - Floor Tiling',
-            quantity=round(floor_area, 2),
+            quantity=floor_qty,
             unit=tiling_rate['unit'],
             rate=tiling_rate['rate'],
+            amount=floor_qty * tiling_rate['rate'],
         )
-        room_cost += tiling_item.amount
         line_items_data.append(tiling_item)
+        total_tiles += floor_qty
 
         # ============ PAINTING ============
         
         # Wall Painting
-        painting_rate = get_rate_for_item('Painting', 'Wall Painting')
-        painting_item = EstimateLineItem.objects.create(
+        painting_item = EstimateLineItem(
             estimate=estimate,
             room=room,
             category='Painting',
             item_name=f'{room.name} - Wall Painting',
-            quantity=round(wall_area, 2),
+            quantity=wall_qty,
             unit=painting_rate['unit'],
             rate=painting_rate['rate'],
+            amount=wall_qty * painting_rate['rate'],
         )
-        room_cost += painting_item.amount
         line_items_data.append(painting_item)
+        total_paint += wall_qty
 
         # ============ ELECTRICAL (estimated) ============
         
-        # Estimate light points based on room size
-        light_points = max(1, int(floor_area / 10))  # 1 point per 10 sqm
-        light_rate = get_rate_for_item('Electrical', 'Light Points')
-        light_item = EstimateLineItem.objects.create(
+        # Light points based on room size (1 point per 10 sqm)
+        light_item = EstimateLineItem(
             estimate=estimate,
             room=room,
             category='Electrical',
@@ -179,13 +186,12 @@ def generate_detailed_estimate(project_id):
             quantity=light_points,
             unit=light_rate['unit'],
             rate=light_rate['rate'],
+            amount=light_points * light_rate['rate'],
         )
-        room_cost += light_item.amount
         line_items_data.append(light_item)
 
         # Switch boards (1 per room minimum)
-        switch_rate = get_rate_for_item('Electrical', 'Switch Board')
-        switch_item = EstimateLineItem.objects.create(
+        switch_item = EstimateLineItem(
             estimate=estimate,
             room=room,
             category='Electrical',
@@ -193,40 +199,46 @@ def generate_detailed_estimate(project_id):
             quantity=1,
             unit=switch_rate['unit'],
             rate=switch_rate['rate'],
+            amount=switch_rate['rate'],
         )
-        room_cost += switch_item.amount
         line_items_data.append(switch_item)
 
         # ============ ROOM SUMMARY ============
         
-        # Create room-level summary
-        RoomEstimate.objects.create(
+        # Create room-level summary (inserted in bulk after the loop)
+        room_estimates.append(RoomEstimate(
             project_id=project_id,
             room=room,
             tiles_sqm=floor_area,
             paint_sqm=wall_area,
-            cement_bags=int(wall_area * 0.2),  # Rough estimate
-            sand_tons=round(wall_area * 0.007, 2),
+            cement_bags=cement_bags,
+            sand_tons=sand_tons,
             cost=round(room_cost, 2)
-        )
+        ))
         
         total_cost += room_cost
 
+    # bulk_create skips save(), so amount is filled in above
+    EstimateLineItem.objects.bulk_create(line_items_data, batch_size=500)
+    RoomEstimate.objects.bulk_create(room_estimates, batch_size=500)
+
     # ============ UPDATE MAIN ESTIMATE ============
     
-    # Calculate totals
-    total_tiles = sum(item.quantity for item in line_items_data if 'Tiling' in item.item_name)
-    total_paint = sum(item.quantity for item in line_items_data if 'Painting' in item.item_name)
-    
     estimate.total_tiles_sqm = round(total_tiles, 2)
     estimate.total_paint_sqm = round(total_paint, 2)
     estimate.cement_bags = int(total_paint * 0.2)  # Rough estimate
     estimate.sand_tons = round(total_paint * 0.007, 2)
     estimate.total_cost = round(total_cost, 2)
-    estimate.save()
+    estimate.category_summary = summarize_by_category(line_items_data)
+    estimate.save(update_fields=[
+        'total_tiles_sqm', 'total_paint_sqm', 'cement_bags',
+        'sand_tons', 'total_cost', 'category_summary', 'updated_at',
+    ])
 
-    print(f"✅ Generated {len(line_items_data)} line items")
-    print(f"💰 Total cost: ₹{total_cost:,.2f}")
+    logger.info(
+        "Generated %d line items for project %s, total cost ₹%.2f",
+        len(line_items_data), project_id, total_cost
+    )
 
     return estimate
 
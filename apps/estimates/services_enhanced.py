@@ -2,10 +2,19 @@
 Enhanced Estimation Service - Generates detailed line items
 """
 
+import functools
+import logging
+
+from django.db import transaction
+from django.db.models import Sum
+
 from apps.rooms.models import Room
 from apps.estimates.models import Estimate, RoomEstimate, EstimateLineItem, RateCard
+from apps.estimates.figures import calculate_room_figures, summarize_by_category
 from datetime import date
 
+logger = logging.getLogger(__name__)
+
 
 # Default rate card if no custom rates exist
 DEFAULT_RATES = {
@@ -35,138 +44,182 @@ DEFAULT_RATES = {
     },
 }
 
+# DEFAULT_RATES flattened to (category, item_name) keys for one-hash lookups
+_DEFAULT_RATES_FLAT = {
+    (category, item_name): rate
+    for category, items in DEFAULT_RATES.items()
+    for item_name, rate in items.items()
+}
+_MISS = {'rate': 0, 'unit': 'sqm'}
+
 
 def get_rate_for_item(category, item_name, location=None):
     """
     Get rate from RateCard or default rates
     """
-    try:
-        rate_card = RateCard.objects.filter(
-            category=category,
-            item_name=item_name,
-            is_active=True,
-            effective_from__lte=date.today()
-        ).order_by('-effective_from').first()
-        
-        if rate_card:
-            return {'rate': rate_card.rate, 'unit': rate_card.unit}
-    except:
-        pass
+    return _lookup_rate(category, item_name, date.today().toordinal())
+
+
+@functools.lru_cache(maxsize=512)
+def _lookup_rate(category, item_name, day_ord):
+    # day_ord keys the cache per day, so rates that become effective
+    # tomorrow are picked up; RateCard saves clear it (see signals.py)
+    rate_card = RateCard.objects.filter(
+        category=category,
+        item_name=item_name,
+        is_active=True,
+        effective_from__lte=date.fromordinal(day_ord)
+    ).order_by('-effective_from').values('rate', 'unit').first()
+    
+    if rate_card:
+        return rate_card
     
     # Fallback to default rates
-    return DEFAULT_RATES.get(category, {}).get(item_name, {'rate': 0, 'unit': 'sqm'})
+    return _default_rate(category, item_name)
 
 
-def calculate_wall_area(floor_area, room_name=''):
+def _default_rate(category, item_name):
+    return _DEFAULT_RATES_FLAT.get((category, item_name), _MISS)
+
+
+def get_rate_map():
     """
-    Estimate wall area from floor area
+    Load every active rate in one query, keyed by (category, item_name).
+    The newest effective rate wins, as in get_rate_for_item.
     """
-    import math
-    
-    # Simplified calculation based on room type
-    if 'TOILET' in room_name.upper() or 'BATHROOM' in room_name.upper():
-        return floor_area * 2.5
-    elif 'BEDROOM' in room_name.upper():
-        return floor_area * 3.0
-    elif 'LIVING' in room_name.upper() or 'HALL' in room_name.upper():
-        return floor_area * 3.5
-    else:
-        return floor_area * 3.0
+    rate_rows = RateCard.objects.filter(
+        is_active=True,
+        effective_from__lte=date.today()
+    ).order_by('category', 'item_name', '-effective_from').values(
+        'category', 'item_name', 'rate', 'unit'
+    )
+
+    rate_map = {}
+    for row in rate_rows:
+        rate_map.setdefault(
+            (row['category'], row['item_name']),
+            {'rate': row['rate'], 'unit': row['unit']}
+        )
+    return rate_map
 
 
+@transaction.atomic
 def generate_detailed_estimate(project_id):
     """
     Generate detailed estimate with line items for each work type
     """
-    rooms = Room.objects.filter(project_id=project_id)
+    # One query, only the columns the figures and line items read
+    rooms = list(Room.objects.filter(project_id=project_id).only('id', 'name', 'area', 'room_type'))
 
-    if not rooms.exists():
-        print("⚠️ No rooms found, skipping estimate")
+    if not rooms:
+        logger.warning("No rooms found for project %s, skipping estimate", project_id)
         return None
 
+    # Create or get estimate, locking it so concurrent regenerations queue up
+    estimate, _ = Estimate.objects.select_for_update().get_or_create(project_id=project_id)
+
     # Clean old estimates
     EstimateLineItem.objects.filter(estimate__project_id=project_id).delete()
     RoomEstimate.objects.filter(project_id=project_id).delete()
-
-    # Create or get estimate
-    estimate, _ = Estimate.objects.get_or_create(project_id=project_id)
     
     total_cost = 0
+    total_tiles = 0
+    total_paint = 0
     line_items_data = []
+    room_estimates = []
+
+    # Resolve every rate up front: one RateCard query for the whole run
+    rate_map = get_rate_map()
+
+    def rate_for(category, item_name):
+        return rate_map.get((category, item_name)) or _default_rate(category, item_name)
 
-    for room in rooms:
+    brickwork_rate = rate_for('Civil', 'Brickwork')
+    plastering_rate = rate_for('Civil', 'Plastering')
+    tiling_rate = rate_for('Interior', 'Floor Tiling')
+    painting_rate = rate_for('Painting', 'Wall Painting')
+    light_rate = rate_for('Electrical', 'Light Points')
+    switch_rate = rate_for('Electrical', 'Switch Board')
+
+    # Per-room float math runs in one pass (Numba kernel when installed)
+    figures = calculate_room_figures(rooms, [
+        brickwork_rate['rate'],
+        plastering_rate['rate'],
+        tiling_rate['rate'],
+        painting_rate['rate'],
+        light_rate['rate'],
+        switch_rate['rate'],
+    ])
+
+    for room, (wall_area, light_points, cement_bags, sand_tons, room_cost) in zip(rooms, figures):
         floor_area = room.area
-        wall_area = calculate_wall_area(floor_area, room.name)
-        room_cost = 0
+        wall_qty = round(wall_area, 2)
+        floor_qty = round(floor_area, 2)
 
         # ============ CIVIL WORKS ============
         
         # Brickwork
-        brickwork_rate = get_rate_for_item('Civil', 'Brickwork')
-        brickwork_item = EstimateLineItem.objects.create(
+        brickwork_item = EstimateLineItem(
             estimate=estimate,
             room=room,
             category='Civil',
             item_name=f'{room.name} - Brickwork',
-            quantity=round(wall_area, 2),
+            quantity=wall_qty,
             unit=brickwork_rate['unit'],
             rate=brickwork_rate['rate'],
+            amount=wall_qty * brickwork_rate['rate'],
         )
-        room_cost += brickwork_item.amount
         line_items_data.append(brickwork_item)
 
         # Plastering
-        plastering_rate = get_rate_for_item('Civil', 'Plastering')
-        plastering_item = EstimateLineItem.objects.create(
+        plastering_item = EstimateLineItem(
             estimate=estimate,
             room=room,
             category='Civil',
             item_name=f'{room.name} - Wall Plastering',
-            quantity=round(wall_area, 2),
+            quantity=wall_qty,
             unit=plastering_rate['unit'],
             rate=plastering_rate['rate'],
+            amount=wall_qty * plastering_rate['rate'],
         )
-        room_cost += plastering_item.amount
         line_items_data.append(plastering_item)
 
         # ============ FLOORING ============
         
         # Floor Tiling
-        tiling_rate = get_rate_for_item('Interior', 'Floor Tiling')
-        tiling_item = EstimateLineItem.objects.create(
+        tiling_item = EstimateLineItem(
             estimate=estimate,
             room=room,
             category='Interior',
             item_name=f'{room.name} - Floor Tiling',
-            quantity=round(floor_area, 2),
+            quantity=floor_qty,
             unit=tiling_rate['unit'],
             rate=tiling_rate['rate'],
+            amount=floor_qty * tiling_rate['rate'],
         )
-        room_cost += tiling_item.amount
         line_items_data.append(tiling_item)
+        total_tiles += floor_qty
 
         # ============ PAINTING ============
         
         # Wall Painting
-        painting_rate = get_rate_for_item('Painting', 'Wall Painting')
-        painting_item = EstimateLineItem.objects.create(
+        painting_item = EstimateLineItem(
             estimate=estimate,
             room=room,
             category='Painting',
             item_name=f'{room.name} - Wall Painting',
-            quantity=round(wall_area, 2),
+            quantity=wall_qty,
             unit=painting_rate['unit'],
             rate=painting_rate['rate'],
+            amount=wall_qty * painting_rate['rate'],
         )
-        room_cost += painting_item.amount
         line_items_data.append(painting_item)
+        total_paint += wall_qty
 
         # ============ ELECTRICAL ============
         
         # Light points
-        light_points = max(1, int(floor_area / 10))
-        light_rate = get_rate_for_item('Electrical', 'Light Points')
-        light_item = EstimateLineItem.objects.create(
+        light_item = EstimateLineItem(
             estimate=estimate,
             room=room,
             category='Electrical',
@@ -174,13 +227,12 @@ def generate_detailed_estimate(project_id):
             quantity=light_points,
             unit=light_rate['unit'],
             rate=light_rate['rate'],
+            amount=light_points * light_rate['rate'],
         )
-        room_cost += light_item.amount
         line_items_data.append(light_item)
 
         # Switch boards
-        switch_rate = get_rate_for_item('Electrical', 'Switch Board')
-        switch_item = EstimateLineItem.objects.create(
+        switch_item = EstimateLineItem(
             estimate=estimate,
             room=room,
             category='Electrical',
@@ -188,38 +240,45 @@ def generate_detailed_estimate(project_id):
             quantity=1,
             unit=switch_rate['unit'],
             rate=switch_rate['rate'],
+            amount=switch_rate['rate'],
         )
-        room_cost += switch_item.amount
         line_items_data.append(switch_item)
 
         # ============ ROOM SUMMARY ============
         
-        RoomEstimate.objects.create(
+        room_estimates.append(RoomEstimate(
             project_id=project_id,
             room=room,
             tiles_sqm=floor_area,
             paint_sqm=wall_area,
-            cement_bags=int(wall_area * 0.2),
-            sand_tons=round(wall_area * 0.007, 2),
+            cement_bags=cement_bags,
+            sand_tons=sand_tons,
             cost=round(room_cost, 2)
-        )
+        ))
         
         total_cost += room_cost
 
+    # bulk_create skips save(), so amount is filled in above
+    EstimateLineItem.objects.bulk_create(line_items_data, batch_size=50)
+    RoomEstimate.objects.bulk_create(room_estimates, batch_size=50)
+
     # ============ UPDATE MAIN ESTIMATE ============
     
-    total_tiles = sum(item.quantity for item in line_items_data if 'Tiling' in item.item_name)
-    total_paint = sum(item.quantity for item in line_items_data if 'Painting' in item.item_name)
-    
     estimate.total_tiles_sqm = round(total_tiles, 2)
     estimate.total_paint_sqm = round(total_paint, 2)
     estimate.cement_bags = int(total_paint * 0.2)
     estimate.sand_tons = round(total_paint * 0.007, 2)
     estimate.total_cost = round(total_cost, 2)
-    estimate.save()
+    estimate.category_summary = summarize_by_category(line_items_data)
+    estimate.save(update_fields=[
+        'total_tiles_sqm', 'total_paint_sqm', 'cement_bags',
+        'sand_tons', 'total_cost', 'category_summary', 'updated_at',
+    ])
 
-    print(f"✅ Generated {len(line_items_data)} line items")
-    print(f"💰 Total cost: ₹{total_cost:,.2f}")
+    logger.info(
+        "Generated %d line items for project %s, total cost ₹%.2f",
+        len(line_items_data), project_id, total_cost
+    )
 
     return estimate
 
@@ -228,36 +287,44 @@ def get_estimate_summary_by_category(project_id):
     """
     Get cost breakdown by category
     """
-    estimate = Estimate.objects.filter(project_id=project_id).first()
+    category_summary = (
+        Estimate.objects
+        .filter(project_id=project_id)
+        .values_list('category_summary', flat=True)
+        .first()
+    )
+    if category_summary:
+        return category_summary
     
-    if not estimate:
-        return {}
-    
-    line_items = EstimateLineItem.objects.filter(estimate=estimate)
+    # Estimates generated before category_summary existed
+    rows = (
+        EstimateLineItem.objects
+        .filter(estimate__project_id=project_id)
+        .order_by('category')
+        .values('category')
+        .annotate(total=Sum('amount'))
+    )
     
-    summary = {}
-    for item in line_items:
-        if item.category not in summary:
-            summary[item.category] = 0
-        summary[item.category] += item.amount
-    
-    return summary
+    return {row['category']: row['total'] for row in rows}
 
 
-def get_detailed_estimate_for_api(project_id):
+def get_detailed_estimate_for_api(project_id, project=None):
     """
     Get complete estimate data for API response
+    Pass project when the caller has already loaded it
     """
     from apps.projects.models import Project
     
-    project = Project.objects.get(id=project_id)
-    estimate = Estimate.objects.filter(project=project).first()
+    if project is None:
+        project = Project.objects.select_related('estimate').get(id=project_id)
+    estimate = getattr(project, 'estimate', None)
     
     if not estimate:
         return None
     
-    line_items = EstimateLineItem.objects.filter(estimate=estimate).select_related('room')
-    category_summary = get_estimate_summary_by_category(project_id)
+    line_items = list(EstimateLineItem.objects.filter(estimate=estimate).select_related('room'))
+    category_summary = estimate.category_summary or summarize_by_category(line_items)
+    totals = get_estimate_totals(estimate)
     
     return {
         'project': {
@@ -267,10 +334,10 @@ def get_detailed_estimate_for_api(project_id):
             'location': project.location,
         },
         'summary': {
-            'total_cost': estimate.total_cost,
+            'total_cost': totals['total_cost'],
             'category_wise': category_summary,
-            'gst': round(estimate.total_cost * 0.18, 2),
-            'grand_total': round(estimate.total_cost * 1.18, 2),
+            'gst': totals['gst'],
+            'grand_total': totals['grand_total'],
         },
         'line_items': [
             {
@@ -292,3 +359,27 @@ def get_detailed_estimate_for_api(project_id):
             'sand_tons': estimate.sand_tons,
         }
     }
+
+
+def get_estimate_totals(estimate):
+    """
+    Subtotal, GST and grand total for an estimate
+    """
+    return {
+        'total_cost': estimate.total_cost,
+        'gst': round(estimate.total_cost * 0.18, 2),
+        'grand_total': round(estimate.total_cost * 1.18, 2),
+    }
+
+
+def iter_line_items(estimate, chunk_size=1000):
+    """
+    Stream line items as plain dicts for exports
+    Rows are fetched chunk_size at a time instead of all at once
+    """
+    yield from (
+        EstimateLineItem.objects
+        .filter(estimate=estimate)
+        .values('category', 'item_name', 'room__name', 'quantity', 'unit', 'rate', 'amount')
+        .iterator(chunk_size=chunk_size)
+    )
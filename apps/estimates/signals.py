@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.estimates.models import Estimate, RateCard
+from apps.estimates.services_enhanced import _lookup_rate
+from apps.projects.cache import invalidate_project_summaries
+from apps.projects.models import Project
+from apps.rooms.models import Room
+
+
+@receiver([post_save, post_delete], sender=RateCard)
+def clear_rate_cache(sender, **kwargs):
+    """Drop memoized rates whenever the rate card changes"""
+    _lookup_rate.cache_clear()
+
+
+def _invalidate_on_commit(project_id):
+    # After commit, so a summary read while the regeneration transaction
+    # is still open can't re-cache the old rows
+    transaction.on_commit(lambda: invalidate_project_summaries(project_id))
+
+
+@receiver([post_save, post_delete], sender=Project)
+def clear_project_summaries(sender, instance, **kwargs):
+    _invalidate_on_commit(instance.pk)
+
+
+# Estimate is saved last on every regeneration, which covers the
+# bulk-written line items and room estimates too. The upload tasks' room
+# swap bypasses the Room signals and invalidates once on its own.
+@receiver([post_save, post_delete], sender=Room)
+@receiver([post_save, post_delete], sender=Estimate)
+def clear_related_summaries(sender, instance, **kwargs):
+    _invalidate_on_commit(instance.project_id)
@@ -0,0 +1,76 @@
+"""
+Rendered estimate documents (PDF, Excel) kept in default storage
+One copy per estimate version; repeat downloads skip the renderer.
+"""
+import hashlib
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+CACHE_DIR = 'estimates'
+
+
+def _version_stem(project, estimate):
+    """
+    Storage name before the suffix for this estimate version
+
+    Changes whenever the estimate is regenerated (updated_at) or the
+    project details printed in the documents change.
+    """
+    project_key = hashlib.md5(
+        "|".join([
+            project.name, project.project_type, project.scope,
+            project.location, str(project.builtup_area),
+        ]).encode()
+    ).hexdigest()[:8]
+    return (
+        f"{CACHE_DIR}/{project.id}_"
+        f"{estimate.updated_at.strftime('%Y%m%d%H%M%S%f')}_{project_key}"
+    )
+
+
+def cached_render(project, estimate, suffix, render):
+    """
+    Open the stored document for this estimate version, rendering on a miss
+
+    render(output) writes the document to a binary file object. Copies of
+    older versions are removed only after the new one is saved and open,
+    and never another request's copy of the same version, so concurrent
+    first downloads can't delete each other's files.
+    """
+    stem = _version_stem(project, estimate)
+    name = f"{stem}{suffix}"
+
+    if default_storage.exists(name):
+        try:
+            return default_storage.open(name, 'rb')
+        except FileNotFoundError:
+            pass  # Removed by a newer version in between; render again
+
+    with tempfile.TemporaryFile() as tmp:
+        render(tmp)
+        tmp.seek(0)
+        name = default_storage.save(name, File(tmp))
+
+    document = default_storage.open(name, 'rb')
+    _drop_stale(project, stem, suffix)
+    return document
+
+
+def _drop_stale(project, stem, suffix):
+    """Remove copies rendered for other versions of this estimate"""
+    prefix = f"{project.id}_"
+    current = stem.rsplit('/', 1)[-1]
+
+    _, files = default_storage.listdir(CACHE_DIR)
+    for filename in files:
+        if (
+            filename.startswith(prefix)
+            and filename.endswith(suffix)
+            and not filename.startswith(current)
+        ):
+            try:
+                default_storage.delete(f"{CACHE_DIR}/{filename}")
+            except FileNotFoundError:
+                pass  # Another request got there first
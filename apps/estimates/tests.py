@@ -1,3 +1,167 @@
-from django.test import TestCase
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.core.files.storage import default_storage
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+
+from apps.estimates import services, services_enhanced
+from apps.estimates.models import EstimateLineItem
+from apps.estimates.storage_cache import cached_render
+from apps.projects.models import Project
+from apps.rooms.models import Room
+
+
+class CategorySummaryTests(TestCase):
+    def setUp(self):
+        services_enhanced._lookup_rate.cache_clear()
+        self.project = Project.objects.create(
+            name="Test House",
+            project_type="Residential",
+            scope="Civil + Interior",
+            location="Pune",
+            builtup_area=1200,
+        )
+        for i, (name, room_type, area) in enumerate([
+            ("BEDROOM", "Bedroom", 14.2),
+            ("TOILET", "Toilet", 4.5),
+            ("LIVING", "Living Room", 25.675),
+            ("KITCHEN", "Other", 9.1),
+        ]):
+            Room.objects.create(
+                project=self.project, name=name, room_type=room_type,
+                area=area, x_center=i, y_center=i,
+            )
+
+    def assertSummaryMatchesLineItems(self, estimate):
+        estimate.refresh_from_db()
+        rows = (
+            EstimateLineItem.objects
+            .filter(estimate=estimate)
+            .values('category')
+            .annotate(total=Sum('amount'))
+        )
+        expected = {row['category']: row['total'] for row in rows}
+
+        self.assertEqual(set(estimate.category_summary), set(expected))
+        for category, total in expected.items():
+            self.assertAlmostEqual(estimate.category_summary[category], total, places=6)
+        self.assertAlmostEqual(sum(expected.values()), estimate.total_cost, places=2)
+
+    def test_enhanced_generator_category_summary(self):
+        estimate = services_enhanced.generate_detailed_estimate(self.project.id)
+        self.assertSummaryMatchesLineItems(estimate)
+
+    def test_legacy_generator_category_summary(self):
+        estimate = services.generate_detailed_estimate(self.project.id)
+        self.assertSummaryMatchesLineItems(estimate)
+
+    def test_material_totals_ignore_room_names(self):
+        # Room names containing item words must not be counted twice
+        Room.objects.create(
+            project=self.project, name="Painting and Tiling Studio", area=10.0,
+            x_center=9, y_center=9,
+        )
+        fields = ('total_tiles_sqm', 'total_paint_sqm', 'cement_bags', 'sand_tons', 'total_cost')
+
+        legacy = services.generate_detailed_estimate(self.project.id)
+        legacy_totals = [getattr(legacy, f) for f in fields]
+        enhanced = services_enhanced.generate_detailed_estimate(self.project.id)
+
+        self.assertEqual(legacy_totals, [getattr(enhanced, f) for f in fields])
+        self.assertAlmostEqual(
+            enhanced.total_tiles_sqm,
+            sum(round(r.area, 2) for r in Room.objects.filter(project=self.project)),
+        )
+
+    def test_no_rooms_no_estimate(self):
+        Room.objects.filter(project=self.project).delete()
+        self.assertIsNone(services_enhanced.generate_detailed_estimate(self.project.id))
+
+
+class RoomTypeTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(
+            name="Test House",
+            project_type="Residential",
+            scope="Civil Only",
+            location="Pune",
+            builtup_area=1200,
+        )
+
+    def test_room_type_follows_name_on_save(self):
+        room = Room.objects.create(
+            project=self.project, name="Master Toilet", area=4.0, x_center=0, y_center=0,
+        )
+        self.assertEqual(room.room_type, "Toilet")
+
+        room.name = "Living Hall"
+        room.save(update_fields=["name"])
+        room.refresh_from_db()
+        self.assertEqual(room.room_type, "Living Room")
+
+    def test_wall_ratio_uses_room_type(self):
+        Room.objects.create(
+            project=self.project, name="TOILET", area=4.0, x_center=0, y_center=0,
+        )
+        services_enhanced.generate_detailed_estimate(self.project.id)
+        room_estimate = self.project.room_estimates.get()
+        self.assertAlmostEqual(room_estimate.paint_sqm, 4.0 * 2.5)
+
+
+class StorageCacheTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.project = Project.objects.create(
+            name="Test House",
+            project_type="Residential",
+            scope="Civil Only",
+            location="Pune",
+            builtup_area=1200,
+        )
+        Room.objects.create(
+            project=self.project, name="BEDROOM", area=14.2, x_center=0, y_center=0,
+        )
+        self.estimate = services_enhanced.generate_detailed_estimate(self.project.id)
+        self.renders = 0
+
+    def render(self, output):
+        self.renders += 1
+        output.write(f"render {self.renders}".encode())
+
+    def read(self, suffix='.pdf'):
+        with cached_render(self.project, self.estimate, suffix, self.render) as f:
+            return f.read()
+
+    def stored(self):
+        return sorted(default_storage.listdir('estimates')[1])
+
+    def test_repeat_download_reuses_copy(self):
+        self.assertEqual(self.read(), b"render 1")
+        self.assertEqual(self.read(), b"render 1")
+        self.assertEqual(self.renders, 1)
+
+    def test_new_version_replaces_old_copy(self):
+        self.read()
+        self.read('.xlsx')
+        self.estimate = services_enhanced.generate_detailed_estimate(self.project.id)
+
+        self.assertEqual(self.read(), b"render 3")
+        files = self.stored()
+        self.assertEqual(len(files), 2)
+        self.assertEqual(sum(f.endswith('.pdf') for f in files), 1)  # .xlsx untouched
+
+    def test_concurrent_first_downloads_keep_each_others_copy(self):
+        # B saves while A is still rendering the same version
+        def render_racing(output):
+            self.read()
+            self.render(output)
+
+        with cached_render(self.project, self.estimate, '.pdf', render_racing) as f:
+            self.assertEqual(f.read(), b"render 2")
+        self.assertEqual(len(self.stored()), 2)
@@ -3,13 +3,14 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import api_view
 from django.shortcuts import get_object_or_404
+from django.core.cache import cache
 from django.http import FileResponse
-import os
 
 from apps.estimates.services_enhanced import generate_detailed_estimate
-from apps.estimates.models import Estimate, RoomEstimate
+from apps.estimates.models import RoomEstimate
+from apps.projects.cache import SUMMARY_TTL, estimate_summary_key
 from apps.projects.models import Project
-from apps.estimates.pdf_generator import generate_estimate_pdf
+from apps.estimates.pdf_generator import cached_estimate_pdf
 
 
 class GenerateEstimateAPIView(APIView):
@@ -18,6 +19,11 @@ class GenerateEstimateAPIView(APIView):
     POST /api/projects/{id}/generate-estimate/
     """
     def post(self, request, project_id):
+        # 404 for unknown projects instead of reporting "no rooms"
+        get_object_or_404(Project.objects.only('id'), id=project_id)
+
+        # The returned instance already holds the saved totals, so the
+        # response below needs no further queries
         estimate = generate_detailed_estimate(project_id)
 
         if not estimate:
@@ -45,11 +51,25 @@ def project_estimate_summary(request, project_id):
     Get estimate summary for a project
     GET /api/projects/{id}/estimate/
     """
-    project = get_object_or_404(Project, id=project_id)
+    key = estimate_summary_key(project_id)
+    payload = cache.get(key)
+
+    if payload is None:
+        payload = _build_estimate_summary(project_id)
+        cache.set(key, payload, SUMMARY_TTL)
+
+    return Response(payload)
+
+
+def _build_estimate_summary(project_id):
+    project = get_object_or_404(Project.objects.select_related('estimate'), id=project_id)
     estimate = getattr(project, "estimate", None)
-    room_estimates = RoomEstimate.objects.filter(project=project)
+    # Plain dicts straight from one JOIN; no model instances per row
+    room_estimates = RoomEstimate.objects.filter(project=project).values(
+        'room__name', 'tiles_sqm', 'paint_sqm', 'cement_bags', 'sand_tons', 'cost'
+    )
 
-    return Response({
+    return {
         "project": {
             "id": project.id,
             "name": project.name,
@@ -64,16 +84,16 @@ def project_estimate_summary(request, project_id):
         },
         "rooms": [
             {
-                "room": r.room.name,
-                "tiles_sqm": r.tiles_sqm,
-                "paint_sqm": r.paint_sqm,
-                "cement_bags": r.cement_bags,
-                "sand_tons": r.sand_tons,
-                "cost": r.cost,
+                "room": r["room__name"],
+                "tiles_sqm": r["tiles_sqm"],
+                "paint_sqm": r["paint_sqm"],
+                "cement_bags": r["cement_bags"],
+                "sand_tons": r["sand_tons"],
+                "cost": r["cost"],
             }
             for r in room_estimates
         ]
-    })
+    }
 
 
 @api_view(["GET"])
@@ -82,7 +102,7 @@ def download_estimate_pdf(request, project_id):
     Generate and download PDF estimate for a project
     GET /api/projects/{id}/estimate/download-pdf/
     """
-    project = get_object_or_404(Project, id=project_id)
+    project = get_object_or_404(Project.objects.select_related('estimate'), id=project_id)
     estimate = getattr(project, "estimate", None)
     
     if not estimate:
@@ -91,18 +111,26 @@ def download_estimate_pdf(request, project_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    room_estimates = RoomEstimate.objects.filter(project=project)
+    room_estimates = (
+        RoomEstimate.objects.filter(project=project)
+        .select_related('room')
+        .only('tiles_sqm', 'paint_sqm', 'cement_bags', 'sand_tons', 'cost', 'room', 'room__name')
+        .order_by('room__name')
+        .iterator(chunk_size=200)
+    )
     
-    # Generate PDF
+    # Generate PDF, or reuse the copy rendered for this estimate version
     try:
-        pdf_path = generate_estimate_pdf(project, estimate, room_estimates)
-        
-        # Return the file
-        pdf_file = open(pdf_path, 'rb')
-        response = FileResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="estimate_{project.name.replace(" ", "_")}.pdf"'
+        pdf_file = cached_estimate_pdf(project, estimate, room_estimates)
         
-        return response
+        # Return the file; FileResponse sets Content-Length and the
+        # attachment header (RFC 5987-encoded for non-ASCII names)
+        return FileResponse(
+            pdf_file,
+            as_attachment=True,
+            filename=f'estimate_{project.name.replace(" ", "_")}.pdf',
+            content_type='application/pdf',
+        )
     
     except Exception as e:
         return Response(
@@ -6,17 +6,16 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
-from django.http import FileResponse, HttpResponse
+from django.http import FileResponse
 import os
 
 from apps.projects.models import Project
-from apps.estimates.models import Estimate, EstimateLineItem, RoomEstimate
 from apps.estimates.services_enhanced import (
     generate_detailed_estimate,
     get_detailed_estimate_for_api,
-    get_estimate_summary_by_category
+    get_estimate_summary_by_category,
 )
-from apps.estimates.pdf_generator import generate_estimate_pdf
+from apps.estimates.excel_generator import cached_estimate_excel
 
 
 @api_view(['GET'])
@@ -62,7 +61,7 @@ def regenerate_detailed_estimate(request, project_id):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        data = get_detailed_estimate_for_api(project_id)
+        data = get_detailed_estimate_for_api(project_id, project=project)
         
         return Response({
             'message': 'Estimate regenerated successfully',
@@ -117,94 +116,22 @@ def download_estimate_excel(request, project_id):
     GET /api/projects/{id}/estimate/download-excel/
     """
     try:
-        import openpyxl
-        from openpyxl.styles import Font, PatternFill, Alignment
-        
-        project = get_object_or_404(Project, id=project_id)
-        data = get_detailed_estimate_for_api(project_id)
+        # Estimate comes back in the same query as the project
+        project = get_object_or_404(Project.objects.select_related('estimate'), id=project_id)
+        estimate = getattr(project, 'estimate', None)
         
-        if not data:
+        if not estimate:
             return Response(
                 {'error': 'No estimate found'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Create workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Estimate"
-        
-        # Title
-        ws.merge_cells('A1:F1')
-        title_cell = ws['A1']
-        title_cell.value = f"PROJECT ESTIMATE - {project.name}"
-        title_cell.font = Font(size=16, bold=True)
-        title_cell.alignment = Alignment(horizontal='center')
-        
-        # Project Info
-        ws['A3'] = 'Project Type:'
-        ws['B3'] = project.project_type
-        ws['A4'] = 'Scope:'
-        ws['B4'] = project.scope
-        ws['A5'] = 'Location:'
-        ws['B5'] = project.location
-        
-        # Headers
-        headers = ['Category', 'Item', 'Room', 'Quantity', 'Unit', 'Rate (₹)', 'Amount (₹)']
-        header_row = 7
-        
-        header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-        header_font = Font(color='FFFFFF', bold=True)
-        
-        for col, header in enumerate(headers, start=1):
-            cell = ws.cell(row=header_row, column=col)
-            cell.value = header
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center')
-        
-        # Data
-        row = header_row + 1
-        for item in data['line_items']:
-            ws.cell(row=row, column=1, value=item['category'])
-            ws.cell(row=row, column=2, value=item['item_name'])
-            ws.cell(row=row, column=3, value=item['room'] or '-')
-            ws.cell(row=row, column=4, value=item['quantity'])
-            ws.cell(row=row, column=5, value=item['unit'])
-            ws.cell(row=row, column=6, value=item['rate'])
-            ws.cell(row=row, column=7, value=item['amount'])
-            row += 1
-        
-        # Totals
-        row += 1
-        ws.cell(row=row, column=6, value='Subtotal:').font = Font(bold=True)
-        ws.cell(row=row, column=7, value=data['summary']['total_cost']).font = Font(bold=True)
-        
-        row += 1
-        ws.cell(row=row, column=6, value='GST (18%):').font = Font(bold=True)
-        ws.cell(row=row, column=7, value=data['summary']['gst']).font = Font(bold=True)
-        
-        row += 1
-        ws.cell(row=row, column=6, value='Grand Total:').font = Font(bold=True, size=14)
-        ws.cell(row=row, column=7, value=data['summary']['grand_total']).font = Font(bold=True, size=14)
-        
-        # Adjust column widths
-        ws.column_dimensions['A'].width = 15
-        ws.column_dimensions['B'].width = 35
-        ws.column_dimensions['C'].width = 20
-        ws.column_dimensions['D'].width = 12
-        ws.column_dimensions['E'].width = 10
-        ws.column_dimensions['F'].width = 12
-        ws.column_dimensions['G'].width = 15
-        
-        # Create response
-        response = HttpResponse(
+        return FileResponse(
+            cached_estimate_excel(project, estimate),
+            as_attachment=True,
+            filename=f'estimate_{project.name.replace(" ", "_")}.xlsx',
             content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         )
-        response['Content-Disposition'] = f'attachment; filename=estimate_{project.name.replace(" ", "_")}.xlsx'
-        
-        wb.save(response)
-        return response
     
     except Exception as e:
         return Response(
@@ -233,11 +160,19 @@ def dxf_analysis_info(request, project_id):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Get DXF file information
-        dxf_info = get_dxf_info(upload.file.path)
-        
-        # Get detected rooms
-        rooms = Room.objects.filter(project_id=project_id)
+        # Get DXF file information; parsed once, then read from the row
+        dxf_info = upload.analysis_json
+        if dxf_info is None:
+            dxf_info = get_dxf_info(upload.file.path)
+            if 'error' not in dxf_info:
+                upload.analysis_json = dxf_info
+                upload.save(update_fields=['analysis_json'])
+        
+        # Get detected rooms (one query; counted in Python)
+        rooms = list(
+            Room.objects.filter(project_id=project_id)
+            .only('name', 'area', 'x_center', 'y_center')
+        )
         
         entity_counts = dxf_info.get('entities', {})
         
@@ -258,7 +193,7 @@ def dxf_analysis_info(request, project_id):
                 'circles': entity_counts.get('CIRCLE', 0),
             },
             'detection_results': {
-                'total_rooms_detected': rooms.count(),
+                'total_rooms_detected': len(rooms),
                 'rooms': [
                     {
                         'name': room.name,
@@ -275,26 +210,3 @@ def dxf_analysis_info(request, project_id):
             {'error': str(e)},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
-
-
-# Add these URL patterns to apps/estimates/urls.py:
-"""
-from apps.estimates.views_enhanced import (
-    estimate_detailed,
-    regenerate_detailed_estimate,
-    estimate_by_category,
-    download_estimate_excel,
-    dxf_analysis_info
-)
-
-urlpatterns = [
-    # ... existing patterns ...
-    
-    # Detailed estimate endpoints
-    path('projects/<int:project_id>/estimate-detailed/', estimate_detailed),
-    path('projects/<int:project_id>/regenerate-estimate/', regenerate_detailed_estimate),
-    path('projects/<int:project_id>/estimate-by-category/', estimate_by_category),
-    path('projects/<int:project_id>/estimate/download-excel/', download_estimate_excel),
-    path('projects/<int:project_id>/dxf-analysis/', dxf_analysis_info),
-]
-"""
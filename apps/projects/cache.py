@@ -0,0 +1,24 @@
+"""
+Response caches for the per-project summary endpoints
+Entries are dropped by signals (apps/estimates/signals.py) once a change
+to the underlying rows commits; the TTL only bounds staleness from bulk
+writes.
+"""
+from django.core.cache import cache
+
+SUMMARY_TTL = 30  # seconds
+
+
+def project_summary_key(project_id):
+    return f"proj_summary:{project_id}"
+
+
+def estimate_summary_key(project_id):
+    return f"estimate_summary:{project_id}"
+
+
+def invalidate_project_summaries(project_id):
+    cache.delete_many([
+        project_summary_key(project_id),
+        estimate_summary_key(project_id),
+    ])
@@ -1,3 +1,59 @@
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIRequestFactory
 
-# Create your tests here.
+from apps.estimates.services_enhanced import generate_detailed_estimate
+from apps.projects.models import Project
+from apps.projects.views import project_summary
+from apps.rooms.models import Room
+
+
+class ProjectSummaryCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.project = Project.objects.create(
+            name="Test House",
+            project_type="Residential",
+            scope="Civil Only",
+            location="Pune",
+            builtup_area=1200,
+        )
+        Room.objects.create(
+            project=self.project, name="BEDROOM", room_type="Bedroom",
+            area=14.2, x_center=0, y_center=0,
+        )
+
+    def get_summary(self):
+        request = self.factory.get(f"/api/projects/{self.project.id}/summary/")
+        return project_summary(request, project_id=self.project.id).data
+
+    def test_summary_invalidated_after_regeneration(self):
+        self.assertEqual(self.get_summary()["estimate"]["total_cost"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            estimate = generate_detailed_estimate(self.project.id)
+
+        self.assertGreater(estimate.total_cost, 0)
+        self.assertEqual(self.get_summary()["estimate"]["total_cost"], estimate.total_cost)
+
+    def test_summary_not_invalidated_before_commit(self):
+        self.get_summary()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            estimate = generate_detailed_estimate(self.project.id)
+            # Read inside the open transaction: still the cached payload
+            self.assertEqual(self.get_summary()["estimate"]["total_cost"], 0)
+
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(self.get_summary()["estimate"]["total_cost"], estimate.total_cost)
+
+    def test_summary_invalidated_after_room_delete(self):
+        self.assertEqual(len(self.get_summary()["rooms"]), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.get(project=self.project).delete()
+
+        self.assertEqual(self.get_summary()["rooms"], [])
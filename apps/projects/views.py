@@ -1,12 +1,14 @@
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
 
+from .cache import SUMMARY_TTL, project_summary_key
 from .models import Project
 from .serializers import ProjectSerializer
 
 from apps.rooms.models import Room
-from apps.estimates.models import Estimate
 
 
 # ✅ CRUD APIs → /api/projects/
@@ -18,24 +20,29 @@ class ProjectViewSet(ModelViewSet):
 # ✅ Summary API → /api/projects/<id>/summary/
 @api_view(["GET"])
 def project_summary(request, project_id):
-    project = Project.objects.get(id=project_id)
+    key = project_summary_key(project_id)
+    payload = cache.get(key)
 
-    rooms = Room.objects.filter(project=project)
-    estimate = Estimate.objects.filter(project=project).first()
+    if payload is None:
+        payload = _build_project_summary(project_id)
+        cache.set(key, payload, SUMMARY_TTL)
 
-    return Response({
+    return Response(payload)
+
+
+def _build_project_summary(project_id):
+    # Estimate JOINed in; rooms come back as plain dicts, no model instances
+    project = get_object_or_404(Project.objects.select_related('estimate'), id=project_id)
+    rooms = list(Room.objects.filter(project=project).values('name', 'area'))
+    estimate = getattr(project, 'estimate', None)
+
+    return {
         "project": {
             "id": project.id,
             "name": project.name,
             "builtup_area": project.builtup_area
         },
-        "rooms": [
-            {
-                "name": r.name,
-                "area": r.area
-            }
-            for r in rooms
-        ],
+        "rooms": rooms,
         "estimate": {
             "total_tiles_sqm": estimate.total_tiles_sqm if estimate else 0,
             "total_paint_sqm": estimate.total_paint_sqm if estimate else 0,
@@ -43,4 +50,4 @@ def project_summary(request, project_id):
             "sand_tons": estimate.sand_tons if estimate else 0,
             "total_cost": estimate.total_cost if estimate else 0
         }
-    })
+    }
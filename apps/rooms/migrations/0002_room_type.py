@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-14 09:26
+
+from django.db import migrations, models
+
+from apps.rooms.services import room_type_for_name
+
+
+def backfill_room_type(apps, schema_editor):
+    """Classify rooms saved before room_type existed from their names"""
+    Room = apps.get_model('rooms', 'Room')
+    rooms = list(Room.objects.only('id', 'name'))
+    for room in rooms:
+        room.room_type = room_type_for_name(room.name)
+    Room.objects.bulk_update(rooms, ['room_type'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0001_initial'),
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='room_type',
+            field=models.CharField(choices=[('Bedroom', 'Bedroom'), ('Kitchen', 'Kitchen'), ('Toilet', 'Toilet'), ('Living Room', 'Living Room'), ('Other', 'Other')], db_index=True, default='Other', max_length=20),
+        ),
+        migrations.RunPython(backfill_room_type, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['project', 'name'], name='rooms_room_project_b997e6_idx'),
+        ),
+    ]
@@ -1,7 +1,16 @@
 from django.db import models
 from apps.projects.models import Project
+from apps.rooms.services import room_type_for_name
 
 class Room(models.Model):
+    ROOM_TYPE_CHOICES = [
+        ('Bedroom', 'Bedroom'),
+        ('Kitchen', 'Kitchen'),
+        ('Toilet', 'Toilet'),
+        ('Living Room', 'Living Room'),
+        ('Other', 'Other'),
+    ]
+
     project = models.ForeignKey(
         Project,
         on_delete=models.CASCADE,
@@ -9,9 +18,32 @@ class Room(models.Model):
     )
 
     name = models.CharField(max_length=100)
+    # Derived from name on save (see apps.rooms.services.room_type_for_name);
+    # bulk_create callers set it themselves
+    room_type = models.CharField(
+        max_length=20,
+        choices=ROOM_TYPE_CHOICES,
+        default='Other',
+        db_index=True
+    )
     area = models.FloatField()   # sqm
     x_center = models.FloatField()
     y_center = models.FloatField()
 
+    class Meta:
+        indexes = [
+            # Per-project room listings, name lookups and ordering
+            models.Index(fields=['project', 'name']),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Keep room_type in step with name, unless a partial update leaves name untouched
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'name' in update_fields:
+            self.room_type = room_type_for_name(self.name)
+            if update_fields is not None and 'room_type' not in update_fields:
+                kwargs['update_fields'] = list(update_fields) + ['room_type']
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} ({self.area:.2f} sqm)"
@@ -1,3 +1,6 @@
+import functools
+
+
 def classify_room(area):
     if area < 6:
         return "Toilet"
@@ -7,3 +10,23 @@ def classify_room(area):
         return "Bedroom"
     else:
         return "Hall"
+
+
+@functools.lru_cache(maxsize=256)
+def room_type_for_name(name):
+    """
+    Map a room name onto Room.ROOM_TYPE_CHOICES
+    Same substring rules the wall-area estimate has always used.
+    Memoized: a plan repeats a handful of names across all its rooms.
+    """
+    name = (name or '').upper()
+    if 'TOILET' in name or 'BATHROOM' in name:
+        return 'Toilet'
+    elif 'BEDROOM' in name:
+        return 'Bedroom'
+    elif 'LIVING' in name or 'HALL' in name:
+        return 'Living Room'
+    elif 'KITCHEN' in name:
+        return 'Kitchen'
+    else:
+        return 'Other'
@@ -2,8 +2,11 @@
 Enhanced DXF Processor with improved room detection and error handling
 """
 import ezdxf
+import numpy as np
+import shapely
 from shapely.geometry import Point, Polygon
 from shapely.errors import ShapelyError
+from shapely.strtree import STRtree
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,24 +25,22 @@ def extract_room_labels(doc):
     msp = doc.modelspace()
     labels = []
 
-    for e in msp:
+    for e in msp.query("TEXT MTEXT"):
         try:
-            if e.dxftype() in ["TEXT", "MTEXT"]:
-                text = e.plain_text().strip().upper()
-                if not text:
-                    continue
+            text = e.plain_text().strip().upper()
+            if not text:
+                continue
 
-                # Get insertion point
-                if hasattr(e.dxf, 'insert'):
-                    x = e.dxf.insert.x
-                    y = e.dxf.insert.y
-                else:
-                    continue
+            # Get insertion point (one attribute lookup)
+            insert = getattr(e.dxf, 'insert', None)
+            if insert is None:
+                continue
+            x, y = insert.x, insert.y
 
-                labels.append({
-                    "name": text,
-                    "point": Point(x, y)
-                })
+            labels.append({
+                "name": text,
+                "point": Point(x, y)
+            })
         except Exception as e:
             logger.warning(f"Error processing text entity: {e}")
             continue
@@ -48,6 +49,48 @@ def extract_room_labels(doc):
     return labels
 
 
+def _lwpolyline_points(e):
+    # Check for closed polylines
+    if e.closed:
+        return e.get_points("xy")
+    return None
+
+
+def _polyline_points(e):
+    # Also check for POLYLINE entities
+    if e.is_closed:
+        return [(loc.x, loc.y) for loc in e.points()]
+    return None
+
+
+BOUNDARY_HANDLERS = {
+    "LWPOLYLINE": _lwpolyline_points,
+    "POLYLINE": _polyline_points,
+}
+BOUNDARY_QUERY = " ".join(BOUNDARY_HANDLERS)
+
+
+def _polygons_from_rings(rings):
+    """
+    Build one Polygon per vertex list in a single vectorized Shapely call
+
+    Args:
+        rings: list of (x, y) point lists, each with at least 3 points
+
+    Returns:
+        tuple: (polygons, areas, valid) arrays aligned with rings
+    """
+    if not rings:
+        return np.empty(0, dtype=object), np.empty(0), np.empty(0, dtype=bool)
+
+    lengths = [len(r) for r in rings]
+    coords = np.array([pt for r in rings for pt in r], dtype=np.float64)
+    indices = np.repeat(np.arange(len(rings)), lengths)
+
+    polys = shapely.polygons(shapely.linearrings(coords, indices=indices))
+    return polys, shapely.area(polys), shapely.is_valid(polys)
+
+
 def extract_room_boundaries(doc, min_area_threshold=100000):
     """
     Extract closed polyline boundaries from DXF file
@@ -60,49 +103,40 @@ def extract_room_boundaries(doc, min_area_threshold=100000):
         list: List of Shapely Polygon objects
     """
     msp = doc.modelspace()
-    boundaries = []
+    rings = []
 
-    for e in msp:
+    for e in msp.query(BOUNDARY_QUERY):
         try:
-            # Check for closed polylines
-            if e.dxftype() == "LWPOLYLINE" and e.closed:
-                pts = [(p[0], p[1]) for p in e.get_points()]
-                
-                if len(pts) < 3:
-                    continue
+            pts = BOUNDARY_HANDLERS[e.dxftype()](e)
 
-                poly = Polygon(pts)
-                
-                # Validate polygon
-                if not poly.is_valid:
-                    logger.warning(f"Invalid polygon found, attempting to fix")
-                    poly = poly.buffer(0)  # Fix self-intersecting polygons
+            if pts and len(pts) >= 3:
+                rings.append(pts)
                     
-                    if not poly.is_valid:
-                        continue
+        except AttributeError as e:
+            logger.warning(f"Error processing boundary entity: {e}")
+            continue
 
-                # Check area threshold
-                if poly.area > min_area_threshold:
-                    boundaries.append(poly)
-                    
-            # Also check for POLYLINE entities
-            elif e.dxftype() == "POLYLINE" and e.is_closed:
-                pts = [(v.dxf.location.x, v.dxf.location.y) for v in e.vertices]
-                
-                if len(pts) < 3:
-                    continue
-                    
-                poly = Polygon(pts)
+    # Areas and validity for every ring at once; only the few invalid
+    # polygons go back through GEOS one by one
+    polys, areas, valid = _polygons_from_rings(rings)
+    boundaries = []
+
+    for poly, area, is_valid in zip(polys, areas, valid):
+        try:
+            # Validate polygon
+            if not is_valid:
+                logger.warning(f"Invalid polygon found, attempting to fix")
+                poly = poly.buffer(0)  # Fix self-intersecting polygons
                 
                 if not poly.is_valid:
-                    poly = poly.buffer(0)
-                    if not poly.is_valid:
-                        continue
-                
-                if poly.area > min_area_threshold:
-                    boundaries.append(poly)
-                    
-        except (ShapelyError, AttributeError) as e:
+                    continue
+                area = poly.area
+
+            # Check area threshold
+            if area > min_area_threshold:
+                boundaries.append(poly)
+
+        except ShapelyError as e:
             logger.warning(f"Error processing boundary entity: {e}")
             continue
 
@@ -110,6 +144,24 @@ def extract_room_boundaries(doc, min_area_threshold=100000):
     return boundaries
 
 
+def _unnamed_rooms(boundaries, area_scale):
+    """Rooms for a plan without text labels: every significant boundary"""
+    rooms = []
+    areas = (shapely.area(boundaries) * area_scale).tolist()
+
+    for center, area in zip(shapely.centroid(boundaries), areas):
+        area_sqm = round(area, 2)
+        # Only add unnamed rooms if they're significant
+        if area_sqm > 5:  # Greater than 5 sqm
+            rooms.append({
+                "name": f"ROOM_{len(rooms) + 1}",
+                "area": area_sqm,
+                "center": center
+            })
+
+    return rooms
+
+
 def match_rooms(doc, area_scale, min_area_threshold=100000):
     """
     Match room labels to boundaries
@@ -125,48 +177,62 @@ def match_rooms(doc, area_scale, min_area_threshold=100000):
     labels = extract_room_labels(doc)
     boundaries = extract_room_boundaries(doc, min_area_threshold)
 
+    if not boundaries:
+        logger.info("Matched 0 rooms")
+        return []
+
+    if not labels:
+        rooms = _unnamed_rooms(boundaries, area_scale)
+        logger.info(f"Matched {len(rooms)} rooms")
+        return rooms
+
     rooms = []
-    used_boundaries = set()
+    # Spatial index over label points; one bulk query returns
+    # (boundary index, label index) pairs for every containment
+    tree = STRtree([label["point"] for label in labels])
+    poly_idx, label_idx = tree.query(boundaries, predicate="contains")
+
+    # Lowest label index per boundary = first label in drawing order;
+    # len(labels) marks a boundary with no label inside
+    first_label = np.full(len(boundaries), len(labels))
+    np.minimum.at(first_label, poly_idx, label_idx)
+
+    # Areas and centroids for all boundaries in one GEOS call each
+    areas = (shapely.area(boundaries) * area_scale).tolist()
+    centers = shapely.centroid(boundaries)
 
     # Try to match each boundary with a label
-    for i, poly in enumerate(boundaries):
-        matched = False
-        
-        for label in labels:
-            # Check if label point is inside this boundary
-            if poly.contains(label["point"]):
-                rooms.append({
-                    "name": label["name"],
-                    "area": round(poly.area * area_scale, 2),
-                    "center": poly.centroid
-                })
-                used_boundaries.add(i)
-                matched = True
-                break
+    for i, li in enumerate(first_label.tolist()):
+        if li < len(labels):
+            rooms.append({
+                "name": labels[li]["name"],
+                "area": round(areas[i], 2),
+                "center": centers[i]
+            })
         
         # If no label found, create unnamed room
-        if not matched:
-            area_sqm = round(poly.area * area_scale, 2)
+        else:
+            area_sqm = round(areas[i], 2)
             # Only add unnamed rooms if they're significant
             if area_sqm > 5:  # Greater than 5 sqm
                 rooms.append({
                     "name": f"ROOM_{len(rooms) + 1}",
                     "area": area_sqm,
-                    "center": poly.centroid
+                    "center": centers[i]
                 })
-                used_boundaries.add(i)
 
     logger.info(f"Matched {len(rooms)} rooms")
     return rooms
 
 
-def detect_rooms_from_dxf(file_path, scale="mm"):
+def detect_rooms_from_dxf(file_path, scale="mm", min_area=None):
     """
     Main function to detect rooms from DXF file
     
     Args:
         file_path: Path to DXF file
         scale: Unit scale - 'mm' or 'm'
+        min_area: Drop rooms smaller than this (sqm); None keeps all
         
     Returns:
         list: List of detected rooms
@@ -195,6 +261,10 @@ def detect_rooms_from_dxf(file_path, scale="mm"):
             # Try with lower threshold
             logger.info("Attempting detection with lower threshold")
             rooms = match_rooms(doc, area_scale, min_threshold / 10)
+
+        # After the fallback, so it still sees every detected room
+        if min_area is not None:
+            rooms = [r for r in rooms if r["area"] >= min_area]
         
         logger.info(f"Total rooms detected: {len(rooms)}")
         return rooms
@@ -234,7 +304,7 @@ def get_dxf_info(file_path):
         info = {
             "version": doc.dxfversion,
             "entities": entity_counts,
-            "total_entities": len(list(msp)),
+            "total_entities": sum(entity_counts.values()),
         }
         
         return info
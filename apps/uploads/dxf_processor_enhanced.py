@@ -6,10 +6,12 @@ ENHANCED DXF Processor with:
 - Detailed logging
 """
 import ezdxf
+import numpy as np
+import shapely
 from shapely.geometry import Point, Polygon
 from shapely.errors import ShapelyError
+from shapely.strtree import STRtree
 import logging
-import math
 
 logger = logging.getLogger(__name__)
 
@@ -42,30 +44,142 @@ def auto_detect_units(boundaries):
         return "mm", 0.000001
 
 
+def _text_label(e):
+    """Label dict for a TEXT/MTEXT entity, or None if it has no usable text"""
+    text = e.plain_text().strip().upper()
+    if not text:
+        return None
+
+    # Get insertion point (one attribute lookup)
+    insert = getattr(e.dxf, 'insert', None)
+    if insert is None:
+        return None
+    x, y = insert.x, insert.y
+
+    logger.debug("Found label: '%s' at (%.2f, %.2f)", text, x, y)
+    return {
+        "name": text,
+        "point": Point(x, y)
+    }
+
+
+# ---- Boundary vertex extraction, one handler per entity type ----
+
+def _lwpolyline_points(e):
+    # 1. LWPOLYLINE (most common - AutoCAD rooms)
+    if e.closed or e.is_closed:
+        pts = e.get_points("xy")
+        logger.debug("LWPOLYLINE: %d points", len(pts))
+        return pts
+    return None
+
+
+def _polyline_points(e):
+    # 2. POLYLINE (older format)
+    if e.is_closed:
+        pts = [(loc.x, loc.y) for loc in e.points()]
+        logger.debug("POLYLINE: %d points", len(pts))
+        return pts
+    return None
+
+
+# 36-point unit circle, same angles as the old per-point math.cos/sin loop
+_UNIT_CIRCLE = np.column_stack([
+    np.cos(np.arange(36) / 36.0 * 2 * np.pi),
+    np.sin(np.arange(36) / 36.0 * 2 * np.pi),
+])
+
+
+def _circle_points(e):
+    # 3. CIRCLE (some plans use circles for rooms)
+    center = e.dxf.center
+    radius = e.dxf.radius
+    
+    # Create polygon approximation of circle: scale and shift the unit circle
+    pts = (_UNIT_CIRCLE * radius + (center.x, center.y)).tolist()
+    
+    logger.debug("CIRCLE: radius=%s", radius)
+    return pts
+
+
+def _spline_points(e):
+    # 4. SPLINE (curved boundaries - convert to polygon)
+    # Approximate spline with line segments
+    if hasattr(e, 'control_points') and len(e.control_points) >= 3:
+        pts = [(p[0], p[1]) for p in e.control_points]
+        logger.debug("SPLINE: %d control points", len(pts))
+        return pts
+    return None
+
+
+BOUNDARY_HANDLERS = {
+    "LWPOLYLINE": _lwpolyline_points,
+    "POLYLINE": _polyline_points,
+    "CIRCLE": _circle_points,
+    "SPLINE": _spline_points,
+}
+BOUNDARY_QUERY = " ".join(BOUNDARY_HANDLERS)
+
+
+def _boundary_points(e, handler):
+    """Vertex list for a boundary entity, or None if it is not usable"""
+    try:
+        pts = handler(e)
+    except AttributeError as err:
+        logger.warning(f"Error processing {e.dxftype()}: {err}")
+        return None
+
+    if pts and len(pts) >= 3:
+        return pts
+    return None
+
+
+def _scan_modelspace(doc):
+    """
+    Read everything room detection needs in one modelspace pass
+
+    Returns:
+        tuple: (entity_counts, labels, rings) where rings are the raw
+               vertex lists of candidate boundaries, in drawing order
+    """
+    entity_counts = {}
+    labels = []
+    rings = []
+
+    for e in doc.modelspace():
+        et = e.dxftype()
+        entity_counts[et] = entity_counts.get(et, 0) + 1
+
+        if et == "TEXT" or et == "MTEXT":
+            try:
+                label = _text_label(e)
+            except Exception as err:
+                logger.warning(f"Error processing text entity: {err}")
+                continue
+            if label:
+                labels.append(label)
+            continue
+
+        handler = BOUNDARY_HANDLERS.get(et)
+        if handler:
+            pts = _boundary_points(e, handler)
+            if pts:
+                rings.append(pts)
+
+    logger.info(f"Found {len(labels)} text labels")
+    return entity_counts, labels, rings
+
+
 def extract_room_labels(doc):
     """Extract text labels from DXF file"""
     msp = doc.modelspace()
     labels = []
 
-    for e in msp:
+    for e in msp.query("TEXT MTEXT"):
         try:
-            if e.dxftype() in ["TEXT", "MTEXT"]:
-                text = e.plain_text().strip().upper()
-                if not text:
-                    continue
-
-                # Get insertion point
-                if hasattr(e.dxf, 'insert'):
-                    x = e.dxf.insert.x
-                    y = e.dxf.insert.y
-                else:
-                    continue
-
-                labels.append({
-                    "name": text,
-                    "point": Point(x, y)
-                })
-                logger.debug(f"Found label: '{text}' at ({x:.2f}, {y:.2f})")
+            label = _text_label(e)
+            if label:
+                labels.append(label)
                 
         except Exception as e:
             logger.warning(f"Error processing text entity: {e}")
@@ -75,111 +189,128 @@ def extract_room_labels(doc):
     return labels
 
 
-def extract_room_boundaries(doc, min_area_threshold=1000):
+def _polygons_from_rings(rings):
     """
-    Extract ALL possible room boundaries from DXF file
-    Supports: LWPOLYLINE, POLYLINE, CIRCLE, RECTANGLE
+    Build one Polygon per vertex list in a single vectorized Shapely call
+    Returns (polygons, areas, valid) arrays aligned with rings
     """
-    msp = doc.modelspace()
+    if not rings:
+        return np.empty(0, dtype=object), np.empty(0), np.empty(0, dtype=bool)
+
+    lengths = [len(r) for r in rings]
+    coords = np.array([pt for r in rings for pt in r], dtype=np.float64)
+    indices = np.repeat(np.arange(len(rings)), lengths)
+
+    polys = shapely.polygons(shapely.linearrings(coords, indices=indices))
+    return polys, shapely.area(polys), shapely.is_valid(polys)
+
+
+def _boundaries_from_rings(rings, min_area_threshold):
+    """Valid polygons above the area threshold, in ring order"""
+    # Areas and validity for every ring at once; only the few invalid
+    # polygons go back through GEOS one by one
+    polys, areas, valid = _polygons_from_rings(rings)
     boundaries = []
+    # Checked once, not per polygon: debug logging is off in production
+    debug = logger.isEnabledFor(logging.DEBUG)
 
-    for e in msp:
-        poly = None
-        
+    for poly, area, is_valid in zip(polys, areas, valid):
         try:
-            # 1. LWPOLYLINE (most common - AutoCAD rooms)
-            if e.dxftype() == "LWPOLYLINE":
-                if e.closed or e.is_closed:
-                    pts = [(p[0], p[1]) for p in e.get_points()]
-                    
-                    if len(pts) >= 3:
-                        poly = Polygon(pts)
-                        logger.debug(f"LWPOLYLINE: {len(pts)} points, area={poly.area if poly else 0}")
-            
-            # 2. POLYLINE (older format)
-            elif e.dxftype() == "POLYLINE":
-                if e.is_closed:
-                    pts = [(v.dxf.location.x, v.dxf.location.y) for v in e.vertices]
-                    
-                    if len(pts) >= 3:
-                        poly = Polygon(pts)
-                        logger.debug(f"POLYLINE: {len(pts)} points, area={poly.area if poly else 0}")
-            
-            # 3. CIRCLE (some plans use circles for rooms)
-            elif e.dxftype() == "CIRCLE":
-                center = e.dxf.center
-                radius = e.dxf.radius
-                
-                # Create polygon approximation of circle
-                pts = []
-                for i in range(36):  # 36-point circle
-                    angle = (i / 36.0) * 2 * math.pi
-                    x = center.x + radius * math.cos(angle)
-                    y = center.y + radius * math.sin(angle)
-                    pts.append((x, y))
-                
-                poly = Polygon(pts)
-                logger.debug(f"CIRCLE: radius={radius}, area={poly.area}")
-            
-            # 4. SPLINE (curved boundaries - convert to polygon)
-            elif e.dxftype() == "SPLINE":
-                # Approximate spline with line segments
-                if hasattr(e, 'control_points') and len(e.control_points) >= 3:
-                    pts = [(p[0], p[1]) for p in e.control_points]
-                    poly = Polygon(pts)
-                    logger.debug(f"SPLINE: {len(pts)} control points")
-            
             # Validate polygon
-            if poly:
+            if not is_valid:
+                logger.warning(f"Invalid polygon, attempting to fix")
+                poly = poly.buffer(0)  # Fix self-intersecting
+                
                 if not poly.is_valid:
-                    logger.warning(f"Invalid polygon, attempting to fix")
-                    poly = poly.buffer(0)  # Fix self-intersecting
-                    
-                    if not poly.is_valid:
-                        continue
-
-                # Check area threshold
-                if poly.area > min_area_threshold:
-                    boundaries.append(poly)
-                    logger.debug(f"✓ Added boundary: area={poly.area:.2f}")
-                else:
-                    logger.debug(f"✗ Skipped (too small): area={poly.area:.2f}")
+                    continue
+                area = poly.area
+
+            # Check area threshold
+            if area > min_area_threshold:
+                boundaries.append(poly)
+                if debug:
+                    logger.debug("✓ Added boundary: area=%.2f", area)
+            elif debug:
+                logger.debug("✗ Skipped (too small): area=%.2f", area)
                     
-        except (ShapelyError, AttributeError) as e:
-            logger.warning(f"Error processing {e.dxftype() if hasattr(e, 'dxftype') else 'entity'}: {e}")
+        except ShapelyError as e:
+            logger.warning(f"Error processing boundary: {e}")
             continue
 
     logger.info(f"Found {len(boundaries)} valid boundaries")
     return boundaries
 
 
-def match_rooms(doc, area_scale, min_area_threshold=1000):
-    """Match room labels to boundaries"""
-    labels = extract_room_labels(doc)
-    boundaries = extract_room_boundaries(doc, min_area_threshold)
+def extract_room_boundaries(doc, min_area_threshold=1000):
+    """
+    Extract ALL possible room boundaries from DXF file
+    Supports: LWPOLYLINE, POLYLINE, CIRCLE, RECTANGLE
+    """
+    rings = []
+
+    for e in doc.modelspace().query(BOUNDARY_QUERY):
+        pts = _boundary_points(e, BOUNDARY_HANDLERS[e.dxftype()])
+        if pts:
+            rings.append(pts)
+
+    return _boundaries_from_rings(rings, min_area_threshold)
+
+
+def _unnamed_rooms(boundaries, area_scale):
+    """Rooms for a plan without text labels, numbered by boundary"""
+    rooms = []
+
+    for i, (poly, area) in enumerate(zip(boundaries, shapely.area(boundaries))):
+        area_sqm = round(area * area_scale, 2)
+        
+        if area_sqm > 0.5:  # At least 0.5 sqm
+            room_name = f"ROOM_{i + 1}"
+            rooms.append({
+                "name": room_name,
+                "area": area_sqm,
+                "center": poly.centroid
+            })
+            
+            logger.info(f"Room {i+1}: '{room_name}' = {area_sqm} sqm")
+
+    return rooms
+
+
+def match_rooms(doc, area_scale, min_area_threshold=1000, *, labels=None, boundaries=None):
+    """
+    Match room labels to boundaries
+    labels/boundaries may be passed in from an earlier scan of doc;
+    boundaries must already be filtered by min_area_threshold.
+    """
+    if labels is None:
+        labels = extract_room_labels(doc)
+    if boundaries is None:
+        boundaries = extract_room_boundaries(doc, min_area_threshold)
 
     if not boundaries:
         logger.warning("No boundaries found! This DXF might not have closed polylines.")
         return []
 
+    if not labels:
+        rooms = _unnamed_rooms(boundaries, area_scale)
+        logger.info(f"Matched {len(rooms)} rooms total")
+        return rooms
+
     rooms = []
     used_labels = set()
+    # Spatial index over label points; query() returns label indices
+    tree = STRtree([label["point"] for label in labels])
 
     # Try to match each boundary with a label
     for i, poly in enumerate(boundaries):
-        matched = False
         best_match = None
-        
-        for j, label in enumerate(labels):
-            if j in used_labels:
-                continue
-                
-            # Check if label point is inside this boundary
-            if poly.contains(label["point"]):
-                best_match = label
-                used_labels.add(j)
-                matched = True
-                break
+
+        # First unused label (in drawing order) inside this boundary
+        free = set(tree.query(poly, predicate="contains").tolist()) - used_labels
+        if free:
+            j = min(free)
+            best_match = labels[j]
+            used_labels.add(j)
         
         # Create room entry
         area_sqm = round(poly.area * area_scale, 2)
@@ -210,17 +341,20 @@ def detect_rooms_from_dxf(file_path, scale="mm"):
         logger.info(f"✓ Opened DXF file: {file_path}")
         logger.info(f"  DXF Version: {doc.dxfversion}")
         
-        # Get entity counts
-        msp = doc.modelspace()
-        entity_types = {}
-        for e in msp:
-            et = e.dxftype()
-            entity_types[et] = entity_types.get(et, 0) + 1
+        # Single modelspace pass: entity counts, labels and boundary vertices
+        entity_types, labels, rings = _scan_modelspace(doc)
         
         logger.info(f"  Entity counts: {entity_types}")
         
-        # First pass: detect boundaries to determine scale
-        preliminary_boundaries = extract_room_boundaries(doc, min_area_threshold=0)
+        # Detect all boundaries once; thresholds below just filter these
+        preliminary_boundaries = _boundaries_from_rings(rings, min_area_threshold=0)
+        preliminary_areas = shapely.area(preliminary_boundaries)
+
+        def boundaries_above(threshold):
+            return [
+                poly for poly, area in zip(preliminary_boundaries, preliminary_areas)
+                if area > threshold
+            ]
         
         if not preliminary_boundaries:
             logger.error("No closed boundaries found in DXF file!")
@@ -249,12 +383,18 @@ def detect_rooms_from_dxf(file_path, scale="mm"):
         logger.info(f"Using area scale: {area_scale} (1 unit² = {area_scale} m²)")
         
         # Extract and match rooms with proper scaling
-        rooms = match_rooms(doc, area_scale, min_threshold)
+        rooms = match_rooms(
+            doc, area_scale, min_threshold,
+            labels=labels, boundaries=boundaries_above(min_threshold)
+        )
         
         if not rooms:
             logger.warning("No rooms detected! Trying with lower threshold...")
             # Try again with very low threshold
-            rooms = match_rooms(doc, area_scale, min_threshold / 100)
+            rooms = match_rooms(
+                doc, area_scale, min_threshold / 100,
+                labels=labels, boundaries=boundaries_above(min_threshold / 100)
+            )
         
         logger.info(f"🎉 Total rooms detected: {len(rooms)}")
         for room in rooms:
@@ -301,7 +441,7 @@ def get_dxf_info(file_path):
         info = {
             "version": doc.dxfversion,
             "entities": entity_counts,
-            "total_entities": len(list(msp)),
+            "total_entities": sum(entity_counts.values()),
             "text_labels": text_count,
             "possible_boundaries": boundary_count,
         }
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-14 09:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('projects', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='plans/')),
+                ('file_type', models.CharField(default='unknown', max_length=20)),
+                ('scale', models.CharField(choices=[('mm', 'Millimeter'), ('m', 'Meter')], default='mm', max_length=10)),
+                ('processed', models.BooleanField(default=False)),
+                ('processing_error', models.TextField(blank=True, null=True)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('analysis_json', models.JSONField(blank=True, null=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='projects.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', '-uploaded_at'], name='planupload_latest_idx')],
+            },
+        ),
+    ]
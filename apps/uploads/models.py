@@ -29,7 +29,22 @@ class PlanUpload(models.Model):
     # ✅ THIS IS THE KEY FIELD FOR STEP 1
     processed = models.BooleanField(default=False)
 
+    # Set when background processing fails (see tasks.enqueue_dxf_upload)
+    processing_error = models.TextField(null=True, blank=True)
+
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    # get_dxf_info() result, stored on first read of the analysis endpoint
+    analysis_json = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Latest upload per project (project_upload_status polling)
+            models.Index(
+                fields=['project', '-uploaded_at'],
+                name='planupload_latest_idx'
+            ),
+        ]
+
     def __str__(self):
         return f"{self.project.name} - Plan ({self.file_type})"
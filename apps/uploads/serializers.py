@@ -6,3 +6,5 @@ class PlanUploadSerializer(serializers.ModelSerializer):
     class Meta:
         model = PlanUpload
         fields = "__all__"
+        # Written by the server only (tasks, dxf_analysis_info)
+        read_only_fields = ["processed", "processing_error", "analysis_json"]
@@ -1,53 +1,173 @@
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from shapely.geometry import Point
+
 from .models import PlanUpload
 from .dxf_processor import detect_rooms_from_dxf
 
+from apps.ai.services import ai_classify_room
+from apps.estimates.models import EstimateLineItem, RoomEstimate
+from apps.projects.cache import invalidate_project_summaries
 from apps.rooms.models import Room
-from apps.rooms.services import classify_room
+from apps.rooms.services import room_type_for_name
 
 # ✅ UPDATED: Import from enhanced services
 from apps.estimates.services_enhanced import generate_detailed_estimate
 
+logger = logging.getLogger(__name__)
+
+ROOMS_CACHE_TTL = 60 * 60 * 24  # seconds
+ROOM_MIN_AREA = 5  # sqm; smaller rooms are not saved
+
+# Concurrent background parses per process (settings.DXF_UPLOAD_WORKERS)
+DXF_UPLOAD_WORKERS = 2
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _detect_rooms_cached(path, scale, min_area):
+    """
+    detect_rooms_from_dxf, memoized on a BLAKE2b hash of the file bytes
+    Re-uploads and retries of the same drawing skip the Shapely work.
+    The file is hashed in chunks, never read into memory whole.
+    """
+    with open(path, "rb") as f:
+        digest = hashlib.file_digest(
+            f, lambda: hashlib.blake2b(digest_size=16)
+        ).hexdigest()
+    key = f"dxf:rooms:{digest}:{scale}:{min_area}"
+
+    cached = cache.get(key)
+    if cached is not None:
+        return [
+            {"name": r["name"], "area": r["area"], "center": Point(r["center"])}
+            for r in cached
+        ]
+
+    rooms_data = detect_rooms_from_dxf(path, scale=scale, min_area=min_area)
+    # Plain values only; Point is stored as an (x, y) pair
+    cache.set(key, [
+        {"name": r["name"], "area": r["area"], "center": (r["center"].x, r["center"].y)}
+        for r in rooms_data
+    ], ROOMS_CACHE_TTL)
+    return rooms_data
+
+
+def delete_project_rooms(project):
+    """
+    Delete a project's rooms without a post_delete signal per row
+
+    The room FK rules are applied by hand: room estimates CASCADE, line
+    items SET_NULL. Summaries are invalidated once, on commit, instead of
+    once per room. Returns (rooms, room_estimates) deleted.
+    """
+    room_estimates, _ = RoomEstimate.objects.filter(room__project=project).delete()
+    EstimateLineItem.objects.filter(room__project=project).update(room=None)
+
+    rooms = Room.objects.filter(project=project)
+    deleted = rooms._raw_delete(rooms.db)
+
+    transaction.on_commit(lambda: invalidate_project_summaries(project.id))
+    return deleted, room_estimates
+
 
 def process_dxf_upload(upload_id):
-    print("🚀 DXF TASK STARTED")
+    logger.info("DXF processing started for upload %s", upload_id)
 
-    upload = PlanUpload.objects.get(id=upload_id)
+    upload = PlanUpload.objects.select_related("project").get(id=upload_id)
     project = upload.project
 
-    rooms_data = detect_rooms_from_dxf(
-        upload.file.path,
-        scale=upload.scale
-    )
+    rooms_data = _detect_rooms_cached(upload.file.path, upload.scale, ROOM_MIN_AREA)
 
-    print("🏠 Rooms detected:", len(rooms_data))
+    logger.info("Rooms detected: %d", len(rooms_data))
 
-    # Remove old rooms
-    Room.objects.filter(project=project).delete()
+    new_rooms = []
 
-    saved = 0
+    # Locals for the loop body: fast loads instead of global lookups
+    room_cls, classify, room_type = Room, ai_classify_room, room_type_for_name
+    append = new_rooms.append
 
+    # Already filtered to ROOM_MIN_AREA, areas are floats
     for r in rooms_data:
-        area = float(r["area"])
+        area = r["area"]
         center = r["center"]
 
-        if area < 5:
-            continue
+        name = classify(r["name"], area)
 
-        Room.objects.create(
+        append(room_cls(
             project=project,
-            name=classify_room(r["name"], area),
+            name=name,
+            room_type=room_type(name),
             area=area,
             x_center=center.x,
             y_center=center.y,
-        )
-        saved += 1
+        ))
+
+    # Room swap, estimate and processed flag commit together (one
+    # fsync), and a failure part-way leaves the previous state intact
+    with transaction.atomic():
+        delete_project_rooms(project)
+        Room.objects.bulk_create(new_rooms, batch_size=500)
+
+        saved = len(new_rooms)
+
+        logger.info("Rooms saved: %d", saved)
+
+        if saved > 0:
+            # ✅ UPDATED: Use generate_detailed_estimate instead of generate_estimate
+            generate_detailed_estimate(project.id)
+            logger.info("Detailed estimate generated for project %s", project.id)
+
+        upload.processed = True
+        upload.processing_error = None
+        upload.save(update_fields=["processed", "processing_error"])
 
-    print(f"✅ Rooms saved: {saved}")
 
-    if saved > 0:
-        # ✅ UPDATED: Use generate_detailed_estimate instead of generate_estimate
-        generate_detailed_estimate(project.id)
-        print("💰 Detailed estimate generated")
+def enqueue_dxf_upload(upload_id):
+    """
+    Process an upload on the shared background pool, off the request worker
 
-    upload.processed = True
-    upload.save()
+    The job is submitted once the surrounding transaction commits, so it
+    always sees the upload row. Clients poll project_upload_status until
+    `processed` flips or `processing_error` is set.
+
+    Stopgap until the project has a task queue: the parse still runs in
+    the web process (at most DXF_UPLOAD_WORKERS at a time, the rest wait
+    in line), and a job does not survive a process restart, so an
+    interrupted upload stays unprocessed and has to be re-uploaded.
+    """
+    transaction.on_commit(
+        lambda: _upload_executor().submit(_process_in_background, upload_id)
+    )
+
+
+def _upload_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "DXF_UPLOAD_WORKERS", DXF_UPLOAD_WORKERS),
+                thread_name_prefix="dxf-upload",
+            )
+        return _executor
+
+
+def _process_in_background(upload_id):
+    try:
+        process_dxf_upload(upload_id)
+    except Exception as e:
+        logger.exception("DXF processing failed for upload %s", upload_id)
+        # The processing transaction has rolled back; record the failure
+        # so the status poll can stop
+        PlanUpload.objects.filter(id=upload_id).update(
+            processing_error=str(e) or type(e).__name__
+        )
+    finally:
+        # Pool threads get their own DB connection; don't hold it between jobs
+        connection.close()
@@ -1,174 +1,193 @@
 """
 DIAGNOSTIC VERSION - Enhanced tasks.py with detailed logging
 This will show EXACTLY what's happening during DXF processing
+
+All output goes to the "apps.uploads.tasks_diagnostic" logger at DEBUG
+level (errors at ERROR); enable DEBUG for it to see the full trace.
 """
+import logging
+
+from django.db import transaction
+
 from .models import PlanUpload
 from .dxf_processor import detect_rooms_from_dxf
+from .tasks import delete_project_rooms
 
+from apps.ai.services import ai_classify_room
 from apps.rooms.models import Room
-from apps.rooms.services import classify_room
+from apps.rooms.services import room_type_for_name
 from apps.estimates.services_enhanced import generate_detailed_estimate
 from apps.estimates.models import EstimateLineItem, RoomEstimate, Estimate
 
+logger = logging.getLogger(__name__)
+
 
 def process_dxf_upload(upload_id):
     """
     Process DXF upload with detailed logging
     """
-    print("\n" + "="*80)
-    print("🚀 DXF PROCESSING STARTED")
-    print("="*80)
-    print(f"📋 Upload ID: {upload_id}")
+    # Loops and extra queries below only run when someone is listening
+    debug = logger.isEnabledFor(logging.DEBUG)
+
+    logger.debug("=" * 80)
+    logger.debug("🚀 DXF PROCESSING STARTED")
+    logger.debug("=" * 80)
+    logger.debug("📋 Upload ID: %s", upload_id)
 
-    upload = PlanUpload.objects.get(id=upload_id)
+    upload = PlanUpload.objects.select_related("project").get(id=upload_id)
     project = upload.project
-    
-    print(f"\n📦 PROJECT INFORMATION:")
-    print(f"   Project ID: {project.id}")
-    print(f"   Project Name: {project.name}")
-    print(f"   Location: {project.location}")
-    
-    print(f"\n📂 FILE INFORMATION:")
-    print(f"   File Path: {upload.file.path}")
-    print(f"   File Name: {upload.file.name}")
-    print(f"   Scale: {upload.scale}")
-    print(f"   Previously Processed: {upload.processed}")
+
+    logger.debug("📦 PROJECT INFORMATION:")
+    logger.debug("   Project ID: %s", project.id)
+    logger.debug("   Project Name: %s", project.name)
+    logger.debug("   Location: %s", project.location)
+
+    logger.debug("📂 FILE INFORMATION:")
+    logger.debug("   File Path: %s", upload.file.path)
+    logger.debug("   File Name: %s", upload.file.name)
+    logger.debug("   Scale: %s", upload.scale)
+    logger.debug("   Previously Processed: %s", upload.processed)
 
     # STEP 1: Detect rooms from DXF
-    print(f"\n🔍 STEP 1: ANALYZING DXF FILE...")
-    
+    logger.debug("🔍 STEP 1: ANALYZING DXF FILE...")
+
     try:
         rooms_data = detect_rooms_from_dxf(
             upload.file.path,
             scale=upload.scale
         )
-        print(f"✅ DXF Analysis Complete")
-        print(f"   Rooms Detected: {len(rooms_data)}")
-        
-        if rooms_data:
-            print(f"\n📐 DETECTED ROOMS:")
+        logger.debug("✅ DXF Analysis Complete")
+        logger.debug("   Rooms Detected: %d", len(rooms_data))
+
+        if not rooms_data:
+            logger.debug("   ⚠️ WARNING: No rooms detected in DXF file!")
+        elif debug:
+            logger.debug("📐 DETECTED ROOMS:")
             for i, r in enumerate(rooms_data, 1):
-                print(f"   {i}. {r['name']}")
-                print(f"      Area: {r['area']} sqm")
-                print(f"      Center: ({r['center'].x:.2f}, {r['center'].y:.2f})")
-        else:
-            print("   ⚠️ WARNING: No rooms detected in DXF file!")
-            
+                logger.debug("   %d. %s", i, r['name'])
+                logger.debug("      Area: %s sqm", r['area'])
+                logger.debug("      Center: (%.2f, %.2f)", r['center'].x, r['center'].y)
+
     except Exception as e:
-        print(f"   ❌ ERROR analyzing DXF: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("   ❌ ERROR analyzing DXF: %s", e)
         raise
 
-    # STEP 2: Clear old data
-    print(f"\n🗑️ STEP 2: CLEARING OLD DATA...")
-    
-    old_rooms = Room.objects.filter(project=project)
-    old_room_count = old_rooms.count()
-    
-    old_room_estimates = RoomEstimate.objects.filter(project=project)
-    old_room_est_count = old_room_estimates.count()
-    
-    old_line_items = EstimateLineItem.objects.filter(estimate__project=project)
-    old_line_item_count = old_line_items.count()
-    
-    print(f"   Deleting {old_room_count} old rooms")
-    print(f"   Deleting {old_room_est_count} old room estimates")
-    print(f"   Deleting {old_line_item_count} old line items")
-    
-    # Delete in correct order to avoid foreign key issues
-    old_line_items.delete()
-    old_room_estimates.delete()
-    old_rooms.delete()
-    
-    print(f"✅ Old data cleared")
-
-    # STEP 3: Save new rooms
-    print(f"\n💾 STEP 3: SAVING NEW ROOMS...")
-    
-    saved = 0
-    skipped = 0
-
-    for r in rooms_data:
-        area = float(r["area"])
-        center = r["center"]
-        
-        print(f"\n   Processing: {r['name']}")
-        print(f"      Area: {area} sqm")
-
-        if area < 5:
-            print(f"      ⏭️ SKIPPED (area < 5 sqm)")
-            skipped += 1
-            continue
-
-        classified_name = classify_room(r["name"], area)
-        
-        new_room = Room.objects.create(
-            project=project,
-            name=classified_name,
-            area=area,
-            x_center=center.x,
-            y_center=center.y,
-        )
-        
-        print(f"      ✅ SAVED as: {classified_name}")
-        print(f"      Database ID: {new_room.id}")
-        saved += 1
-
-    print(f"\n📊 SAVE SUMMARY:")
-    print(f"   Total detected: {len(rooms_data)}")
-    print(f"   Saved: {saved}")
-    print(f"   Skipped: {skipped}")
-
-    # STEP 4: Generate estimate
-    print(f"\n💰 STEP 4: GENERATING ESTIMATE...")
-    
-    if saved > 0:
-        try:
-            # Get current rooms to verify
-            current_rooms = Room.objects.filter(project=project)
-            print(f"   Rooms in database: {current_rooms.count()}")
-            
-            for room in current_rooms:
-                print(f"      - {room.name}: {room.area} sqm")
-            
-            # Generate estimate
-            estimate = generate_detailed_estimate(project.id)
-            
-            if estimate:
-                print(f"✅ Estimate generated successfully")
-                print(f"   Total Cost: ₹{estimate.total_cost:,.2f}")
-                print(f"   Tiles: {estimate.total_tiles_sqm} sqm")
-                print(f"   Paint: {estimate.total_paint_sqm} sqm")
-                
-                # Count line items
-                line_items = EstimateLineItem.objects.filter(estimate=estimate)
-                print(f"   Line Items: {line_items.count()}")
-                
-                # Show category breakdown
-                categories = {}
-                for item in line_items:
-                    categories[item.category] = categories.get(item.category, 0) + item.amount
-                
-                print(f"\n   💵 COST BY CATEGORY:")
-                for cat, cost in categories.items():
-                    print(f"      {cat}: ₹{cost:,.2f}")
-            else:
-                print(f"   ⚠️ Estimate generation returned None")
-                
-        except Exception as e:
-            print(f"   ❌ ERROR generating estimate: {str(e)}")
-            import traceback
-            print(traceback.format_exc())
-    else:
-        print(f"   ⏭️ No estimate generated (no rooms saved)")
-
-    # STEP 5: Mark as processed
-    print(f"\n✅ STEP 5: FINALIZING...")
-    upload.processed = True
-    upload.save()
-    print(f"   Upload marked as processed")
-
-    print(f"\n" + "="*80)
-    print("🏁 DXF PROCESSING COMPLETED")
-    print("="*80 + "\n")
+    # STEPS 2-5 commit as one unit: a single fsync, and a failure part-way
+    # leaves the previous rooms and estimate intact
+    with transaction.atomic():
+        # STEP 2: Clear old data
+        logger.debug("🗑️ STEP 2: CLEARING OLD DATA...")
+
+        # Line items first: their room FK is SET_NULL, so deleting rooms
+        # first would UPDATE them just before they go. The deletes report
+        # their counts, so no COUNT queries are needed up front.
+        deleted_items, _ = EstimateLineItem.objects.filter(estimate__project=project).delete()
+        deleted_rooms, deleted_room_estimates = delete_project_rooms(project)
+
+        logger.debug("   Deleted %d old rooms", deleted_rooms)
+        logger.debug("   Deleted %d old room estimates", deleted_room_estimates)
+        logger.debug("   Deleted %d old line items", deleted_items)
+
+        logger.debug("✅ Old data cleared")
+
+        # STEP 3: Save new rooms
+        logger.debug("💾 STEP 3: SAVING NEW ROOMS...")
+
+        new_rooms = []
+        skipped = 0
+
+        # Locals for the loop body: fast loads instead of global lookups
+        room_cls, classify, room_type = Room, ai_classify_room, room_type_for_name
+        to_float, log = float, logger.debug
+
+        for r in rooms_data:
+            area = to_float(r["area"])
+            center = r["center"]
+
+            log("   Processing: %s", r['name'])
+            log("      Area: %s sqm", area)
+
+            if area < 5:
+                log("      ⏭️ SKIPPED (area < 5 sqm)")
+                skipped += 1
+                continue
+
+            classified_name = classify(r["name"], area)
+
+            new_rooms.append(room_cls(
+                project=project,
+                name=classified_name,
+                room_type=room_type(classified_name),
+                area=area,
+                x_center=center.x,
+                y_center=center.y,
+            ))
+
+            log("      ✅ CLASSIFIED as: %s", classified_name)
+
+        # One INSERT per batch instead of one per room; the returned
+        # instances carry their primary keys
+        saved_rooms = Room.objects.bulk_create(new_rooms, batch_size=500)
+        saved = len(saved_rooms)
+
+        if debug:
+            for room in saved_rooms:
+                logger.debug("   ✅ SAVED: %s (Database ID: %s)", room.name, room.id)
+
+        logger.debug("📊 SAVE SUMMARY:")
+        logger.debug("   Total detected: %d", len(rooms_data))
+        logger.debug("   Saved: %d", saved)
+        logger.debug("   Skipped: %d", skipped)
+
+        # STEP 4: Generate estimate
+        logger.debug("💰 STEP 4: GENERATING ESTIMATE...")
+
+        if saved > 0:
+            try:
+                # Savepoint, so a failed estimate doesn't poison the
+                # outer transaction before the upload is finalized
+                with transaction.atomic():
+                    # Rooms just inserted, from memory rather than a re-SELECT
+                    logger.debug("   Rooms in database: %d", saved)
+
+                    if debug:
+                        for room in saved_rooms:
+                            logger.debug("      - %s: %s sqm", room.name, room.area)
+
+                    # Generate estimate
+                    estimate = generate_detailed_estimate(project.id)
+
+                    if not estimate:
+                        logger.debug("   ⚠️ Estimate generation returned None")
+                    elif debug:
+                        logger.debug("✅ Estimate generated successfully")
+                        logger.debug("   Total Cost: ₹%s", f"{estimate.total_cost:,.2f}")
+                        logger.debug("   Tiles: %s sqm", estimate.total_tiles_sqm)
+                        logger.debug("   Paint: %s sqm", estimate.total_paint_sqm)
+
+                        # Count line items
+                        logger.debug(
+                            "   Line Items: %d",
+                            EstimateLineItem.objects.filter(estimate=estimate).count()
+                        )
+
+                        # Show category breakdown: totals were stored on the
+                        # estimate when it was generated, no rows to pull back
+                        logger.debug("   💵 COST BY CATEGORY:")
+                        for cat, cost in estimate.category_summary.items():
+                            logger.debug("      %s: ₹%s", cat, f"{cost:,.2f}")
+
+            except Exception as e:
+                logger.exception("   ❌ ERROR generating estimate: %s", e)
+        else:
+            logger.debug("   ⏭️ No estimate generated (no rooms saved)")
+
+        # STEP 5: Mark as processed
+        logger.debug("✅ STEP 5: FINALIZING...")
+        upload.processed = True
+        upload.save(update_fields=["processed"])
+        logger.debug("   Upload marked as processed")
+
+    logger.debug("=" * 80)
+    logger.debug("🏁 DXF PROCESSING COMPLETED")
+    logger.debug("=" * 80)
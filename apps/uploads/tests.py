@@ -1,3 +1,253 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+import ezdxf
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models.signals import post_delete
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+from shapely.geometry import Point
+
+from apps.estimates.models import Estimate, EstimateLineItem, RoomEstimate
+from apps.estimates.services_enhanced import generate_detailed_estimate
+from apps.projects.models import Project
+from apps.rooms.models import Room
+from apps.uploads import tasks, tasks_diagnostic
+from apps.uploads.dxf_processor import (
+    extract_room_boundaries,
+    extract_room_labels,
+    match_rooms,
+)
+from apps.uploads.models import PlanUpload
+from apps.uploads.views import PlanUploadViewSet, project_upload_status
+
+
+def _reference_match_rooms(doc, area_scale, min_area_threshold):
+    """The per-boundary, per-label loop match_rooms replaced"""
+    labels = extract_room_labels(doc)
+    rooms = []
+
+    for poly in extract_room_boundaries(doc, min_area_threshold):
+        label = next((l for l in labels if poly.contains(l["point"])), None)
+        area_sqm = round(poly.area * area_scale, 2)
+
+        if label is not None:
+            rooms.append({"name": label["name"], "area": area_sqm, "center": poly.centroid})
+        elif area_sqm > 5:
+            rooms.append({"name": f"ROOM_{len(rooms) + 1}", "area": area_sqm, "center": poly.centroid})
+
+    return rooms
+
+
+def _fixture_doc(with_labels=True):
+    """Small plan in mm: labelled, double-labelled, unlabelled and tiny rooms"""
+    doc = ezdxf.new()
+    msp = doc.modelspace()
+
+    for x, y, w, h in [
+        (0, 0, 4000, 3000),        # BEDROOM
+        (4000, 0, 2000, 2500),     # TOILET, then a second label
+        (0, 3000, 6000, 4500),     # no label, 27 sqm
+        (6000, 0, 1500, 1500),     # no label, 2.25 sqm: dropped
+    ]:
+        msp.add_lwpolyline(
+            [(x, y), (x + w, y), (x + w, y + h), (x, y + h)], close=True
+        )
+    # Closed POLYLINE with a living room label
+    msp.add_polyline2d(
+        [(8000, 0), (13000, 0), (13000, 5000), (8000, 5000)], close=True
+    )
+    # Self-intersecting bow-tie: repaired with buffer(0) to 4 sqm, dropped unnamed
+    msp.add_lwpolyline(
+        [(14000, 0), (18000, 4000), (18000, 0), (14000, 4000)], close=True
+    )
+
+    if with_labels:
+        msp.add_text("Bedroom", dxfattribs={"insert": (2000, 1500)})
+        msp.add_text("Toilet", dxfattribs={"insert": (5000, 1000)})
+        msp.add_mtext("Bath", dxfattribs={"insert": (5000, 2000)})
+        msp.add_text("Living", dxfattribs={"insert": (10000, 2500)})
+        msp.add_text("Store", dxfattribs={"insert": (50000, 50000)})  # outside every room
+    return doc
+
+
+class MatchRoomsTests(TestCase):
+    def assertSameRooms(self, doc, area_scale, threshold):
+        def plain(rooms):
+            return [(r["name"], r["area"], r["center"].x, r["center"].y) for r in rooms]
+
+        expected = _reference_match_rooms(doc, area_scale, threshold)
+        self.assertTrue(expected)
+        self.assertEqual(plain(match_rooms(doc, area_scale, threshold)), plain(expected))
+
+    def test_matches_per_entity_loop(self):
+        doc = _fixture_doc()
+        for threshold in (0, 1000, 100000):
+            self.assertSameRooms(doc, 0.000001, threshold)
+
+    def test_matches_per_entity_loop_without_labels(self):
+        doc = _fixture_doc(with_labels=False)
+        for threshold in (0, 100000):
+            self.assertSameRooms(doc, 0.000001, threshold)
+
+    def test_first_label_in_drawing_order_wins(self):
+        names = [r["name"] for r in match_rooms(_fixture_doc(), 0.000001, 0)]
+        self.assertIn("TOILET", names)
+        self.assertNotIn("BATH", names)
+        self.assertNotIn("STORE", names)
+
+
+class ProcessingFailureTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(
+            name="Test House",
+            project_type="Residential",
+            scope="Civil Only",
+            location="Pune",
+            builtup_area=1200,
+        )
+        self.upload = PlanUpload.objects.create(
+            project=self.project, file="plans/test.dxf", file_type="dxf"
+        )
+
+    def get_status(self):
+        request = APIRequestFactory().get(
+            f"/api/projects/{self.project.id}/upload-status/"
+        )
+        return project_upload_status(request, project_id=self.project.id).data
+
+    def test_enqueue_submits_to_pool_after_commit(self):
+        executor = mock.Mock()
+        with mock.patch.object(tasks, "_upload_executor", return_value=executor), \
+                self.captureOnCommitCallbacks(execute=True):
+            tasks.enqueue_dxf_upload(self.upload.id)
+            executor.submit.assert_not_called()
+
+        executor.submit.assert_called_once_with(tasks._process_in_background, self.upload.id)
+
+    # The worker closes its own connection; keep the test's open
+    @mock.patch.object(tasks, "connection")
+    def test_failure_sets_error_status(self, _connection):
+        self.assertEqual(self.get_status(), {"status": "processing"})
+
+        with mock.patch.object(tasks, "process_dxf_upload", side_effect=ValueError("bad drawing")), \
+                self.assertLogs("apps.uploads.tasks", level="ERROR"):
+            tasks._process_in_background(self.upload.id)
+
+        self.upload.refresh_from_db()
+        self.assertFalse(self.upload.processed)
+        self.assertEqual(self.upload.processing_error, "bad drawing")
+        self.assertEqual(self.get_status(), {"status": "failed", "error": "bad drawing"})
+
+    @mock.patch.object(tasks, "connection")
+    def test_success_clears_error(self, _connection):
+        PlanUpload.objects.filter(id=self.upload.id).update(processing_error="bad drawing")
+
+        with mock.patch.object(tasks, "_detect_rooms_cached", return_value=[]):
+            tasks._process_in_background(self.upload.id)
+
+        self.upload.refresh_from_db()
+        self.assertTrue(self.upload.processed)
+        self.assertIsNone(self.upload.processing_error)
+        self.assertEqual(self.get_status(), {"status": "completed"})
+
+
+class ProcessDxfUploadTests(TestCase):
+    rooms_data = [
+        {"name": "BEDROOM 1", "area": 14.2, "center": Point(1, 2)},
+        {"name": "TOILET", "area": 5.0, "center": Point(3, 4)},
+        {"name": "ROOM_3", "area": 25.0, "center": Point(5, 6)},
+    ]
+
+    def setUp(self):
+        self.project = Project.objects.create(
+            name="Test House",
+            project_type="Residential",
+            scope="Civil Only",
+            location="Pune",
+            builtup_area=1200,
+        )
+        self.upload = PlanUpload.objects.create(
+            project=self.project, file="plans/test.dxf", file_type="dxf"
+        )
+
+    def assertRoomsSaved(self):
+        rooms = list(
+            Room.objects.filter(project=self.project)
+            .order_by("id")
+            .values_list("name", "room_type", "area", "x_center", "y_center")
+        )
+        self.assertEqual(rooms, [
+            ("Bedroom", "Bedroom", 14.2, 1.0, 2.0),
+            ("Bathroom", "Toilet", 5.0, 3.0, 4.0),
+            ("Living Room", "Living Room", 25.0, 5.0, 6.0),
+        ])
+        self.assertTrue(Estimate.objects.filter(project=self.project, total_cost__gt=0).exists())
+        self.upload.refresh_from_db()
+        self.assertTrue(self.upload.processed)
+
+    def test_detected_rooms_are_classified_and_saved(self):
+        with mock.patch.object(tasks, "_detect_rooms_cached", return_value=self.rooms_data):
+            tasks.process_dxf_upload(self.upload.id)
+        self.assertRoomsSaved()
+
+    def test_diagnostic_task_saves_detected_rooms(self):
+        with mock.patch.object(tasks_diagnostic, "detect_rooms_from_dxf", return_value=self.rooms_data):
+            tasks_diagnostic.process_dxf_upload(self.upload.id)
+        self.assertRoomsSaved()
+
+    def test_room_swap_replaces_old_rooms_without_row_signals(self):
+        old_room = Room.objects.create(
+            project=self.project, name="STORE", area=8.0, x_center=0, y_center=0,
+        )
+        generate_detailed_estimate(self.project.id)
+        self.assertTrue(RoomEstimate.objects.filter(room=old_room).exists())
+
+        receiver = mock.Mock()
+        post_delete.connect(receiver, sender=Room)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Room)
+
+        with mock.patch.object(tasks, "_detect_rooms_cached", return_value=self.rooms_data), \
+                self.captureOnCommitCallbacks() as callbacks:
+            tasks.process_dxf_upload(self.upload.id)
+
+        receiver.assert_not_called()
+        self.assertFalse(Room.objects.filter(id=old_room.id).exists())
+        self.assertFalse(RoomEstimate.objects.filter(room_id=old_room.id).exists())
+        self.assertFalse(EstimateLineItem.objects.filter(room_id=old_room.id).exists())
+        self.assertTrue(callbacks)
+        self.assertRoomsSaved()
+
+
+class UnsupportedUploadTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(
+            name="Test House",
+            project_type="Residential",
+            scope="Civil Only",
+            location="Pune",
+            builtup_area=1200,
+        )
+
+    def test_unsupported_file_is_not_queued(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        request = APIRequestFactory().post(
+            "/api/uploads/",
+            {"project": self.project.id, "file": SimpleUploadedFile("plan.pdf", b"%PDF")},
+            format="multipart",
+        )
+        with mock.patch("apps.uploads.views.enqueue_dxf_upload") as enqueue, \
+                override_settings(MEDIA_ROOT=media_root):
+            response = PlanUploadViewSet.as_view({"post": "create"})(request)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("processing started", response.data["message"])
+        enqueue.assert_not_called()
+
+        status_request = APIRequestFactory().get(f"/api/projects/{self.project.id}/upload-status/")
+        self.assertEqual(
+            project_upload_status(status_request, project_id=self.project.id).data,
+            {"status": "unsupported"},
+        )
@@ -1,3 +1,6 @@
+import logging
+import os
+
 from rest_framework import viewsets, status
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
@@ -5,7 +8,14 @@ from rest_framework.decorators import api_view
 
 from .models import PlanUpload
 from .serializers import PlanUploadSerializer
-from .tasks import process_dxf_upload
+from .tasks import enqueue_dxf_upload
+
+logger = logging.getLogger(__name__)
+
+# File extension -> PlanUpload.file_type
+_EXT_MAP = {".dxf": "dxf", ".dwg": "dwg"}
+# file_type values the background processor accepts
+PROCESSABLE_TYPES = frozenset(_EXT_MAP.values())
 
 
 class PlanUploadViewSet(viewsets.ModelViewSet):
@@ -14,32 +24,25 @@ class PlanUploadViewSet(viewsets.ModelViewSet):
     parser_classes = (MultiPartParser, FormParser)
 
     def create(self, request, *args, **kwargs):
-        print("📦 REQUEST DATA:", request.data)
-
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        upload = serializer.save()
+        # Detect file type up front so the row is written by one INSERT
+        ext = os.path.splitext(serializer.validated_data["file"].name)[1].lower()
+        upload = serializer.save(file_type=_EXT_MAP.get(ext, "unknown"))
 
-        # Detect file type
-        filename = upload.file.name.lower()
-        if filename.endswith(".dxf"):
-            upload.file_type = "dxf"
-        elif filename.endswith(".dwg"):
-            upload.file_type = "dwg"
+        # ✅ NO CELERY: processed on a background thread, clients poll
+        # project_upload_status for completion
+        if upload.file_type in PROCESSABLE_TYPES:
+            logger.info("Queued DXF processing for upload %s", upload.id)
+            enqueue_dxf_upload(upload.id)
+            message = "Plan uploaded, processing started"
         else:
-            upload.file_type = "unknown"
-
-        upload.save()
-
-        # ✅ RUN DIRECTLY (NO CELERY)
-        if upload.file_type in ["dxf", "dwg"]:
-            print("🚀 Running DXF processing synchronously")
-            process_dxf_upload(upload.id)
+            message = "Plan uploaded; file type not supported for processing"
 
         return Response(
             {
-                "message": "Plan uploaded and processed",
+                "message": message,
                 "project_id": upload.project.id,
                 "upload_id": upload.id,
             },
@@ -49,17 +52,31 @@ class PlanUploadViewSet(viewsets.ModelViewSet):
 
 @api_view(["GET"])
 def project_upload_status(request, project_id):
+    # Polled by the frontend: read the status columns, not the whole row
     upload = (
         PlanUpload.objects.filter(project_id=project_id)
         .order_by("-uploaded_at")
+        .values("file_type", "processed", "processing_error")
         .first()
     )
 
-    if not upload:
+    if upload is None:
         return Response({"status": "no_upload"})
 
+    # Never queued, so it would otherwise read as processing forever
+    if upload["file_type"] not in PROCESSABLE_TYPES:
+        return Response({"status": "unsupported"})
+
+    if upload["processing_error"]:
+        return Response(
+            {
+                "status": "failed",
+                "error": upload["processing_error"],
+            }
+        )
+
     return Response(
         {
-            "status": "completed" if upload.processed else "processing"
+            "status": "completed" if upload["processed"] else "processing"
         }
     )